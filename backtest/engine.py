@@ -201,22 +201,16 @@ class BacktestEngine:
         """运行基于Tick的回测（需要Tick数据）"""
         logger.info("运行Tick回测...")
         
-        # 加载Tick数据
-        ticks = self.history_data.get_tick(
+        # 逐条读取Tick数据（多月Tick数据量很大，不一次性加载到内存）
+        ticks = self.history_data.iter_tick(
             self.symbol,
             self.start_date.strftime('%Y-%m-%d'),
-            self.end_date.strftime('%Y-%m-%d'),
-            from_db=True
+            self.end_date.strftime('%Y-%m-%d')
         )
         
-        if not ticks:
-            logger.warning("未找到Tick数据，切换到K线回测模式")
-            self._run_bar_backtest()
-            return
-        
-        logger.info(f"加载Tick数据: {len(ticks)} 条")
-        
-        for i, tick in enumerate(ticks):
+        tick = None
+        count = 0
+        for tick in ticks:
             # 更新持仓价格
             self.portfolio.update_price(self.symbol, tick.last_price)
             
@@ -224,12 +218,19 @@ class BacktestEngine:
             self.strategy.on_tick(tick)
             
             # 记录权益曲线（每100条记录一次）
-            if i % 100 == 0:
+            if count % 100 == 0:
                 self.portfolio.record_equity(tick.datetime)
+            count += 1
+        
+        if tick is None:
+            logger.warning("未找到Tick数据，切换到K线回测模式")
+            self._run_bar_backtest()
+            return
+        
+        logger.info(f"Tick回测完成: {count} 条")
         
         # 最后记录一次
-        if ticks:
-            self.portfolio.record_equity(ticks[-1].datetime)
+        self.portfolio.record_equity(tick.datetime)
     
     def _bind_trading_methods(self):
         """将组合的交易方法绑定到策略"""
@@ -2,9 +2,12 @@
 数据库管理器
 """
 import os
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import create_engine, and_, or_
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Iterator, List, Optional, Set, Tuple
+from sqlalchemy import Date, create_engine, and_, or_, event, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -13,6 +16,24 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 流式查询时每批从数据库读取的行数
+_STREAM_BATCH_SIZE = 5_000
+
+# 批量写入时每批executemany的行数
+_INSERT_CHUNK_SIZE = 10_000
+
+# 数据库连接池大小（SQLite使用SQLAlchemy默认连接池）
+_POOL_SIZE = 16
+_POOL_MAX_OVERFLOW = 8
+
+
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    """SQLite连接参数：WAL日志模式下读写互不阻塞，synchronous=NORMAL减少每次提交的fsync"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 
 class DatabaseManager:
     """数据库管理器"""
@@ -33,7 +54,13 @@ class DatabaseManager:
             db_url = f'sqlite:///{db_path}'
         
         self.db_url = db_url
-        self.engine = create_engine(db_url, echo=False, pool_pre_ping=True)
+        if db_url.startswith('sqlite'):
+            self.engine = create_engine(db_url, echo=False, pool_pre_ping=True)
+            event.listen(self.engine, 'connect', _set_sqlite_pragma)
+        else:
+            # 连接池大小满足CTPHistoryData.download_many等多线程并行读写
+            self.engine = create_engine(db_url, echo=False, pool_pre_ping=True,
+                                        pool_size=_POOL_SIZE, max_overflow=_POOL_MAX_OVERFLOW)
         self.SessionLocal = sessionmaker(bind=self.engine)
         
         # 创建表
@@ -65,6 +92,41 @@ class DatabaseManager:
         """获取数据库会话"""
         return self.SessionLocal()
     
+    def _insert_ignore(self, table):
+        """
+        构造忽略唯一约束冲突的INSERT语句
+        
+        Args:
+            table: 表对象
+        """
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            return sqlite_insert(table).on_conflict_do_nothing()
+        if dialect == 'postgresql':
+            return postgresql_insert(table).on_conflict_do_nothing()
+        if dialect in ('mysql', 'mariadb'):
+            return insert(table).prefix_with('IGNORE')
+        return insert(table)
+    
+    def _insert_many(self, model, objects: List, ignore_conflicts: bool = False) -> None:
+        """
+        批量插入模型对象
+        
+        在一个事务内按_INSERT_CHUNK_SIZE分批executemany，不经过ORM会话的逐对象处理。
+        
+        Args:
+            model: 模型类（KlineData、TickData）
+            objects: 模型对象列表
+            ignore_conflicts: 是否跳过违反唯一约束的行（已存在的数据）
+        """
+        columns = [c.key for c in model.__table__.columns if not c.primary_key]
+        get_values = attrgetter(*columns)
+        stmt = self._insert_ignore(model.__table__) if ignore_conflicts else insert(model.__table__)
+        with self.engine.begin() as conn:
+            for i in range(0, len(objects), _INSERT_CHUNK_SIZE):
+                rows = [dict(zip(columns, get_values(obj))) for obj in objects[i:i + _INSERT_CHUNK_SIZE]]
+                conn.execute(stmt, rows)
+    
     # ========== K线数据操作 ==========
     
     def save_kline(self, kline_data: KlineData) -> bool:
@@ -102,19 +164,14 @@ class DatabaseManager:
             session.close()
     
     def save_klines_batch(self, kline_list: List[KlineData]) -> bool:
-        """批量保存K线数据"""
-        session = self.get_session()
+        """批量保存K线数据（已存在的K线，即合约、周期、时间都相同的，由数据库忽略）"""
         try:
-            session.bulk_save_objects(kline_list)
-            session.commit()
+            self._insert_many(KlineData, kline_list, ignore_conflicts=True)
             logger.info(f"批量保存K线数据成功，共{len(kline_list)}条")
             return True
         except SQLAlchemyError as e:
-            session.rollback()
             logger.error(f"批量保存K线数据失败: {e}")
             return False
-        finally:
-            session.close()
     
     def get_klines(self, symbol: str, interval: str, 
                    start_time: Optional[datetime] = None,
@@ -123,6 +180,10 @@ class DatabaseManager:
         """
         查询K线数据
         
+        条件与复合索引 (symbol, interval, datetime) 的列顺序一致，
+        数据库按索引范围查找，不必扫描整张表。结果一次全部载入列表，
+        大范围逐条处理时改用iter_klines。
+        
         Args:
             symbol: 合约代码
             interval: K线周期
@@ -137,9 +198,11 @@ class DatabaseManager:
                 KlineData.interval == interval
             )
             
-            if start_time:
+            if start_time and end_time:
+                query = query.filter(KlineData.datetime.between(start_time, end_time))
+            elif start_time:
                 query = query.filter(KlineData.datetime >= start_time)
-            if end_time:
+            elif end_time:
                 query = query.filter(KlineData.datetime <= end_time)
             
             query = query.order_by(KlineData.datetime.asc())
@@ -154,8 +217,35 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def iter_klines(self, symbol: str, interval: str,
+                    start_time: Optional[datetime] = None,
+                    end_time: Optional[datetime] = None) -> Iterator[KlineData]:
+        """
+        按时间顺序逐条读取K线数据（流式，不在内存中保留全部结果）
+        
+        Args:
+            symbol: 合约代码
+            interval: K线周期
+            start_time: 开始时间
+            end_time: 结束时间
+        """
+        stmt = select(KlineData).where(
+            KlineData.symbol == symbol,
+            KlineData.interval == interval
+        )
+        if start_time:
+            stmt = stmt.where(KlineData.datetime >= start_time)
+        if end_time:
+            stmt = stmt.where(KlineData.datetime <= end_time)
+        yield from self._stream(stmt.order_by(KlineData.datetime.asc()), "K线")
+    
     def get_latest_kline(self, symbol: str, interval: str) -> Optional[KlineData]:
-        """获取最新一条K线数据"""
+        """
+        获取最新一条K线数据
+        
+        ORDER BY datetime DESC LIMIT 1，数据库沿复合索引 (symbol, interval, datetime)
+        反向读取第一行即返回，耗时与表大小无关。
+        """
         session = self.get_session()
         try:
             return session.query(KlineData).filter(
@@ -168,6 +258,68 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_range_meta(self, symbol: str, interval: str
+                       ) -> Tuple[Optional[datetime], Optional[datetime], int]:
+        """
+        获取数据库中某合约某周期K线的时间范围和条数
+        
+        MIN/MAX(datetime) 由数据库在唯一索引 (symbol, interval, datetime) 的两端直接读取，
+        调用方可以先用它判断请求的时间段是否已在库中，再决定是否查询。
+        
+        Args:
+            symbol: 合约代码
+            interval: K线周期
+        
+        Returns:
+            (最早时间, 最晚时间, 条数)，没有数据或查询失败时为 (None, None, 0)
+        """
+        session = self.get_session()
+        try:
+            min_dt, max_dt, count = session.execute(
+                select(func.min(KlineData.datetime), func.max(KlineData.datetime), func.count())
+                .where(KlineData.symbol == symbol, KlineData.interval == interval)
+            ).one()
+            return min_dt, max_dt, count
+        except SQLAlchemyError as e:
+            logger.error(f"查询K线时间范围失败: {e}")
+            return None, None, 0
+        finally:
+            session.close()
+    
+    def get_kline_dates(self, symbol: str, interval: str,
+                        start_time: datetime, end_time: datetime) -> Set[date]:
+        """
+        获取某合约某周期在 [start_time, end_time] 内有K线的日期
+        
+        由数据库在唯一索引 (symbol, interval, datetime) 上按范围读取并去重，
+        每个日期只返回一行，调用方可以据此发现整天缺失的数据。
+        
+        Args:
+            symbol: 合约代码
+            interval: K线周期
+            start_time: 开始时间
+            end_time: 结束时间
+        
+        Returns:
+            日期集合，查询失败时为空集合
+        """
+        session = self.get_session()
+        try:
+            rows = session.execute(
+                select(func.date(KlineData.datetime, type_=Date)).distinct().where(
+                    KlineData.symbol == symbol,
+                    KlineData.interval == interval,
+                    KlineData.datetime >= start_time,
+                    KlineData.datetime <= end_time
+                )
+            ).scalars()
+            return set(rows)
+        except SQLAlchemyError as e:
+            logger.error(f"查询K线日期失败: {e}")
+            return set()
+        finally:
+            session.close()
+    
     # ========== Tick数据操作 ==========
     
     def save_tick(self, tick_data: TickData) -> bool:
@@ -206,18 +358,13 @@ class DatabaseManager:
     
     def save_ticks_batch(self, tick_list: List[TickData]) -> bool:
         """批量保存Tick数据"""
-        session = self.get_session()
         try:
-            session.bulk_save_objects(tick_list)
-            session.commit()
+            self._insert_many(TickData, tick_list)
             logger.info(f"批量保存Tick数据成功，共{len(tick_list)}条")
             return True
         except SQLAlchemyError as e:
-            session.rollback()
             logger.error(f"批量保存Tick数据失败: {e}")
             return False
-        finally:
-            session.close()
     
     def get_ticks(self, symbol: str,
                   start_time: Optional[datetime] = None,
@@ -255,6 +402,45 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def iter_ticks(self, symbol: str,
+                   start_time: Optional[datetime] = None,
+                   end_time: Optional[datetime] = None) -> Iterator[TickData]:
+        """
+        按时间顺序逐条读取Tick数据（流式，不在内存中保留全部结果）
+        
+        Args:
+            symbol: 合约代码
+            start_time: 开始时间
+            end_time: 结束时间
+        """
+        stmt = select(TickData).where(TickData.symbol == symbol)
+        if start_time:
+            stmt = stmt.where(TickData.datetime >= start_time)
+        if end_time:
+            stmt = stmt.where(TickData.datetime <= end_time)
+        yield from self._stream(stmt.order_by(TickData.datetime.asc()), "Tick")
+    
+    def _stream(self, stmt, name: str) -> Iterator:
+        """
+        以服务端游标分批执行查询并逐个返回ORM对象
+        
+        会话在迭代结束（或生成器被关闭）时关闭；查询出错时记录日志并结束迭代。
+        
+        Args:
+            stmt: select语句
+            name: 数据名称（用于日志）
+        """
+        session = self.get_session()
+        try:
+            result = session.execute(
+                stmt.execution_options(stream_results=True, yield_per=_STREAM_BATCH_SIZE)
+            )
+            yield from result.scalars()
+        except SQLAlchemyError as e:
+            logger.error(f"查询{name}数据失败: {e}")
+        finally:
+            session.close()
+    
     # ========== 合约信息操作 ==========
     
     def save_contract(self, contract: ContractInfo) -> bool:
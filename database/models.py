@@ -2,7 +2,8 @@
 数据库模型定义
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Float, Integer, DateTime, Index, create_engine
+from typing import Optional
+from sqlalchemy import Column, String, Float, Integer, DateTime, Index, UniqueConstraint, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -26,12 +27,31 @@ class KlineData(Base):
     open_interest = Column(Integer, default=0, comment='持仓量')
     turnover = Column(Float, default=0.0, comment='成交额')
     
-    # 创建复合索引，优化查询性能
+    # 唯一约束同时作为复合索引，优化查询性能；重复K线由数据库在写入时忽略
     __table_args__ = (
-        Index('idx_kline_symbol_interval_datetime', 'symbol', 'interval', 'datetime'),
+        UniqueConstraint('symbol', 'interval', 'datetime', name='uq_kline_symbol_interval_datetime'),
         Index('idx_kline_datetime', 'datetime'),
     )
     
+    def __init__(self, symbol: str, exchange: str, datetime: datetime, interval: str,
+                 open: float, high: float, low: float, close: float,
+                 volume: int = 0, open_interest: int = 0, turnover: float = 0.0):
+        """
+        显式的构造函数：可按位置传参，且不经过声明式默认构造函数对每个关键字参数的检查
+        （聚合、转换时会批量创建大量K线对象）
+        """
+        self.symbol = symbol
+        self.exchange = exchange
+        self.datetime = datetime
+        self.interval = interval
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.open_interest = open_interest
+        self.turnover = turnover
+    
     def __repr__(self):
         return f"<KlineData(symbol={self.symbol}, datetime={self.datetime}, close={self.close})>"
 
@@ -59,6 +79,24 @@ class TickData(Base):
         Index('idx_tick_datetime', 'datetime'),
     )
     
+    def __init__(self, symbol: str, exchange: str, datetime: datetime, last_price: float,
+                 volume: int = 0, open_interest: int = 0,
+                 bid_price1: Optional[float] = None, bid_volume1: Optional[int] = None,
+                 ask_price1: Optional[float] = None, ask_volume1: Optional[int] = None,
+                 turnover: float = 0.0):
+        """显式的构造函数：可按位置传参，行情回调中逐Tick创建对象时开销更小"""
+        self.symbol = symbol
+        self.exchange = exchange
+        self.datetime = datetime
+        self.last_price = last_price
+        self.volume = volume
+        self.open_interest = open_interest
+        self.bid_price1 = bid_price1
+        self.bid_volume1 = bid_volume1
+        self.ask_price1 = ask_price1
+        self.ask_volume1 = ask_volume1
+        self.turnover = turnover
+    
     def __repr__(self):
         return f"<TickData(symbol={self.symbol}, datetime={self.datetime}, price={self.last_price})>"
 
@@ -39,6 +39,25 @@ def fix_database():
                 except Exception as e:
                     print(f"  ✗ 删除索引失败 {idx_name}: {e}")
         
+        # 旧版本创建的K线表没有唯一约束：删除重复K线（保留最早写入的一条）后补建唯一索引。
+        # 唯一约束可能写在建表语句中，也可能是之前运行本脚本补建的独立索引，两者都没有时才处理
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='kline_data'")
+        row = cursor.fetchone()
+        if (row and 'uq_kline_symbol_interval_datetime' not in row[0]
+                and 'uq_kline_symbol_interval_datetime' not in indexes):
+            cursor.execute(
+                "DELETE FROM kline_data WHERE id NOT IN "
+                "(SELECT MIN(id) FROM kline_data GROUP BY symbol, interval, datetime)"
+            )
+            if cursor.rowcount > 0:
+                print(f"  ✓ 删除重复K线: {cursor.rowcount}条")
+            cursor.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_kline_symbol_interval_datetime "
+                "ON kline_data (symbol, interval, datetime)"
+            )
+            # 列相同的普通复合索引已被唯一索引取代
+            cursor.execute("DROP INDEX IF EXISTS idx_kline_symbol_interval_datetime")
+        
         conn.commit()
         conn.close()
         
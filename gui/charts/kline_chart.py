@@ -6,15 +6,30 @@ from datetime import datetime
 import numpy as np
 import pyqtgraph as pg
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QGraphicsRectItem
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QThreadPool, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QColor, QPen, QBrush
 
 from database.models import KlineData
 from indicators.ma import MA, EMA
+from indicators.kline_frame import KlineFrame
+from gui.utils.indicator_task import IndicatorTask
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 均线指标: (名称, 周期, 颜色)
+_MA_LINES = (
+    ('MA5', 5, 'yellow'),
+    ('MA10', 10, 'cyan'),
+    ('MA20', 20, 'magenta'),
+    ('MA60', 60, 'orange'),
+)
+
+
+def _calculate_ma_lines(closes: np.ndarray, periods: List[int]) -> Dict[int, np.ndarray]:
+    """计算各周期均线（在工作线程中执行），无效值为NaN"""
+    return {period: MA(closes, period) for period in periods}
+
 
 class KlineChartWidget(QWidget):
     """K线图表组件"""
@@ -34,6 +49,7 @@ class KlineChartWidget(QWidget):
             'EMA12': False,
             'EMA26': False,
         }
+        self._indicator_request = 0  # 最近一次指标计算请求的编号，用于丢弃过期结果
         self.setup_ui()
     
     def setup_ui(self):
@@ -168,12 +184,9 @@ class KlineChartWidget(QWidget):
             self.kline_plot.removeItem(item)
         for item in self.volume_items:
             self.volume_plot.removeItem(item)
-        for item in self.indicator_items:
-            self.kline_plot.removeItem(item)
         
         self.kline_items.clear()
         self.volume_items.clear()
-        self.indicator_items.clear()
         
         # 准备数据
         n = len(self.klines)
@@ -184,11 +197,12 @@ class KlineChartWidget(QWidget):
         x = np.arange(n)
         
         # K线数据
-        opens = np.array([k.open for k in self.klines])
-        highs = np.array([k.high for k in self.klines])
-        lows = np.array([k.low for k in self.klines])
-        closes = np.array([k.close for k in self.klines])
-        volumes = np.array([k.volume for k in self.klines])
+        frame = KlineFrame.from_klines(self.klines)
+        opens = frame.open
+        highs = frame.high
+        lows = frame.low
+        closes = frame.close
+        volumes = frame.volume
         
         # 绘制K线
         for i in range(n):
@@ -233,36 +247,8 @@ class KlineChartWidget(QWidget):
                 self.kline_plot.addItem(line)
                 self.kline_items.append(line)
         
-        # 绘制技术指标
-        closes_list = closes.tolist()
-        
-        if self.indicators['MA5']:
-            ma5_values = MA(closes_list, 5)
-            ma5_array = np.array([v if v is not None else np.nan for v in ma5_values])
-            ma5_line = pg.PlotDataItem(x, ma5_array, pen=pg.mkPen('yellow', width=1), name='MA5')
-            self.kline_plot.addItem(ma5_line)
-            self.indicator_items.append(ma5_line)
-        
-        if self.indicators['MA10']:
-            ma10_values = MA(closes_list, 10)
-            ma10_array = np.array([v if v is not None else np.nan for v in ma10_values])
-            ma10_line = pg.PlotDataItem(x, ma10_array, pen=pg.mkPen('cyan', width=1), name='MA10')
-            self.kline_plot.addItem(ma10_line)
-            self.indicator_items.append(ma10_line)
-        
-        if self.indicators['MA20']:
-            ma20_values = MA(closes_list, 20)
-            ma20_array = np.array([v if v is not None else np.nan for v in ma20_values])
-            ma20_line = pg.PlotDataItem(x, ma20_array, pen=pg.mkPen('magenta', width=1), name='MA20')
-            self.kline_plot.addItem(ma20_line)
-            self.indicator_items.append(ma20_line)
-        
-        if self.indicators['MA60']:
-            ma60_values = MA(closes_list, 60)
-            ma60_array = np.array([v if v is not None else np.nan for v in ma60_values])
-            ma60_line = pg.PlotDataItem(x, ma60_array, pen=pg.mkPen('orange', width=1), name='MA60')
-            self.kline_plot.addItem(ma60_line)
-            self.indicator_items.append(ma60_line)
+        # 绘制技术指标（在线程池中计算，完成后回到GUI线程绘制）
+        self.request_indicators(closes)
         
         # 绘制成交量
         volume_colors = [QColor(255, 80, 80) if closes[i] >= opens[i] else QColor(0, 200, 0) for i in range(n)]
@@ -283,16 +269,48 @@ class KlineChartWidget(QWidget):
             self.kline_plot.setXRange(0, max(n - 1, 0))
             self.volume_plot.setXRange(0, max(n - 1, 0))
     
+    def request_indicators(self, closes: np.ndarray):
+        """提交均线计算任务，旧的均线在新结果到达前保持显示"""
+        self._indicator_request += 1
+        periods = [period for name, period, _ in _MA_LINES if self.indicators[name]]
+        if not periods:
+            self._clear_indicator_items()
+            return
+        
+        task = IndicatorTask(self._indicator_request, _calculate_ma_lines, closes.copy(), periods)
+        task.signals.finished.connect(self.on_indicators_ready)
+        QThreadPool.globalInstance().start(task)
+    
+    @pyqtSlot(int, object)
+    def on_indicators_ready(self, request_id: int, lines: Dict[int, np.ndarray]):
+        """均线计算完成，替换图上的均线（过期的结果直接丢弃）"""
+        if request_id != self._indicator_request:
+            return
+        
+        self._clear_indicator_items()
+        for name, period, color in _MA_LINES:
+            values = lines.get(period)
+            if values is None:
+                continue
+            line = pg.PlotDataItem(np.arange(len(values)), values, pen=pg.mkPen(color, width=1), name=name)
+            self.kline_plot.addItem(line)
+            self.indicator_items.append(line)
+    
+    def _clear_indicator_items(self):
+        """移除图上的均线"""
+        for item in self.indicator_items:
+            self.kline_plot.removeItem(item)
+        self.indicator_items.clear()
+    
     def clear(self):
         """清除图表"""
+        self._indicator_request += 1
         self.klines.clear()
         for item in self.kline_items:
             self.kline_plot.removeItem(item)
         for item in self.volume_items:
             self.volume_plot.removeItem(item)
-        for item in self.indicator_items:
-            self.kline_plot.removeItem(item)
+        self._clear_indicator_items()
         self.kline_items.clear()
         self.volume_items.clear()
-        self.indicator_items.clear()
 
@@ -13,6 +13,7 @@ from threading import Thread
 
 from gui.utils.signal_bridge import SignalBridge
 from gui.utils.theme import Theme
+from gui.utils.log_handler import GuiLogForwarder
 from gui.business_logic import BusinessLogicManager
 from utils.logger import get_logger
 
@@ -47,6 +48,10 @@ class MainWindow(QMainWindow):
         
         # 连接信号
         self.signal_bridge.connection_status_changed.connect(self.update_connection_status)
+        
+        # 系统日志转发到日志窗口（后台线程格式化、批量发送）
+        self.log_forwarder = GuiLogForwarder(self.signal_bridge)
+        self.log_forwarder.start()
     
     def setup_ui(self):
         """设置UI"""
@@ -345,6 +350,7 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             # 断开连接等清理工作
+            self.log_forwarder.stop()
             event.accept()
         else:
             event.ignore()
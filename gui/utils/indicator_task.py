@@ -0,0 +1,53 @@
+"""
+指标计算任务 - 在QThreadPool中计算技术指标，结果通过信号回到GUI线程
+"""
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+from typing import Any, Callable
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class IndicatorTaskSignals(QObject):
+    """指标计算任务的信号（QRunnable不是QObject，信号放在单独的对象上）"""
+    finished = pyqtSignal(int, object)  # (request_id, result)
+
+
+class IndicatorTask(QRunnable):
+    """
+    在线程池中执行一次指标计算
+
+    signals在创建任务的线程（GUI线程）中构造，工作线程发出finished时
+    以队列连接投递到接收方，所有Qt对象的修改都留在GUI线程中完成。
+
+    用法:
+        task = IndicatorTask(request_id, TechnicalIndicators.calculate_all, klines)
+        task.signals.finished.connect(self.on_indicators_ready)
+        QThreadPool.globalInstance().start(task)
+    """
+
+    def __init__(self, request_id: int, func: Callable[..., Any], *args, **kwargs):
+        """
+        初始化
+
+        Args:
+            request_id: 请求编号，接收方据此丢弃过期的结果
+            func: 计算函数（不能访问任何Qt对象）
+            *args, **kwargs: 传给计算函数的参数
+        """
+        super().__init__()
+        self.request_id = request_id
+        self.signals = IndicatorTaskSignals()
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def run(self):
+        """在工作线程中执行计算"""
+        try:
+            result = self._func(*self._args, **self._kwargs)
+        except Exception as e:
+            logger.error(f"指标计算失败: {e}", exc_info=True)
+            return
+        self.signals.finished.emit(self.request_id, result)
@@ -0,0 +1,74 @@
+"""
+界面日志处理 - 通过QueueHandler/QueueListener在后台线程格式化日志并批量发送到界面
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from gui.utils.signal_bridge import SignalBridge
+
+
+class GuiLogHandler(logging.Handler):
+    """在QueueListener线程中格式化日志，交给信号桥接攒批发送到界面"""
+
+    def __init__(self, signal_bridge: SignalBridge):
+        """
+        初始化
+
+        Args:
+            signal_bridge: 信号桥接对象
+        """
+        super().__init__()
+        self.signal_bridge = signal_bridge
+        self.setFormatter(logging.Formatter(
+            '[%(asctime)s] [%(levelname)s] %(message)s',
+            datefmt='%H:%M:%S'
+        ))
+
+    def emit(self, record: logging.LogRecord):
+        """格式化日志并加入当前批次"""
+        try:
+            log_entry = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self.signal_bridge.emit_log_entry(record.levelname, log_entry)
+
+    def flush(self):
+        """发送当前批次"""
+        self.signal_bridge.flush_logs()
+
+
+class GuiLogForwarder:
+    """
+    将根日志记录器的输出转发到界面
+
+    各模块记录日志时只做一次入队操作，格式化和批量发送都在
+    QueueListener的后台线程中完成，不占用GUI线程。
+    """
+
+    def __init__(self, signal_bridge: SignalBridge, level: int = logging.INFO):
+        """
+        初始化
+
+        Args:
+            signal_bridge: 信号桥接对象
+            level: 转发到界面的最低日志级别
+        """
+        log_queue: queue.Queue = queue.Queue(-1)
+        self._queue_handler = QueueHandler(log_queue)
+        self._queue_handler.setLevel(level)
+        self._gui_handler = GuiLogHandler(signal_bridge)
+        self._listener = QueueListener(log_queue, self._gui_handler)
+
+    def start(self):
+        """开始转发"""
+        self._listener.start()
+        logging.getLogger().addHandler(self._queue_handler)
+
+    def stop(self):
+        """停止转发并发送剩余日志"""
+        logging.getLogger().removeHandler(self._queue_handler)
+        self._listener.stop()
+        self._gui_handler.flush()
+        self._gui_handler.close()
@@ -2,23 +2,105 @@
 信号桥接 - 将CTP接口回调转换为Qt信号，确保线程安全
 """
 from PyQt6.QtCore import QObject, pyqtSignal
-from typing import Dict, Any, List, Optional
+from threading import Event, RLock, Thread
+import time
+from typing import Dict, Any, List, Optional, NamedTuple
 from database.models import TickData, KlineData
 from trading.order import Order
-from backtest.portfolio import Position
+from backtest.portfolio import Position, Direction
+
+
+class PositionUpdate(NamedTuple):
+    """跨线程传递的持仓快照（只包含界面显示所需字段）"""
+    symbol: str
+    direction: Direction
+    volume: int
+    avg_price: float
+    current_price: float
+    
+    @classmethod
+    def from_position(cls, position: Position) -> "PositionUpdate":
+        """从Position对象构建持仓快照"""
+        return cls(
+            position.symbol,
+            position.direction,
+            position.volume,
+            position.entry_price,
+            position.current_price
+        )
+
+
+class SignalBatcher:
+    """
+    将高频的单条数据攒成批次，通过一个list信号一次性发送
+    
+    未攒满的批次由一个常驻的后台线程在第一条数据到达interval秒后发送。
+    发送在持有锁时进行（跨线程信号只是投递事件），各批次按数据到达顺序发出。
+    """
+    
+    def __init__(self, signal, max_size: int = 50, interval: float = 0.02):
+        """
+        初始化
+        
+        Args:
+            signal: 参数为list的绑定信号
+            max_size: 批次达到该数量时立即发送
+            interval: 批次中第一条数据到达后最多等待的时间（秒）
+        """
+        self._signal = signal
+        self._max_size = max_size
+        self._interval = interval
+        self._items: List[Any] = []
+        # 可重入：同线程直连的槽函数中再次add()（如槽函数里写日志）不会死锁
+        self._lock = RLock()
+        self._pending = Event()  # 新批次的第一条数据到达时置位，唤醒发送线程
+        self._flush_thread: Optional[Thread] = None
+    
+    def add(self, item: Any):
+        """加入一条数据（可在任意线程调用）"""
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) >= self._max_size:
+                self._emit_locked()
+            elif len(self._items) == 1:
+                self._pending.set()
+                if self._flush_thread is None:
+                    self._flush_thread = Thread(target=self._flush_loop, daemon=True)
+                    self._flush_thread.start()
+    
+    def flush(self):
+        """立即发送当前批次"""
+        with self._lock:
+            self._emit_locked()
+    
+    def _emit_locked(self):
+        """发送并清空当前批次（调用方需持有锁）"""
+        batch = self._items
+        if not batch:
+            return
+        self._items = []
+        self._signal.emit(batch)
+    
+    def _flush_loop(self):
+        """发送循环：新批次开始后等待interval秒，发送未攒满的批次"""
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            time.sleep(self._interval)
+            self.flush()
 
 
 class SignalBridge(QObject):
     """信号桥接类，用于线程安全的数据传递"""
     
     # 行情数据信号
-    tick_received = pyqtSignal(object)  # TickData
+    ticks_received = pyqtSignal(list)  # [TickData]，按到达顺序批量发送
     bar_received = pyqtSignal(object)    # KlineData
     
     # 交易数据信号
     order_updated = pyqtSignal(object)   # Order
     trade_updated = pyqtSignal(object)   # Trade
-    position_updated = pyqtSignal(object)  # Position
+    position_updated = pyqtSignal(PositionUpdate)  # PositionUpdate
     account_updated = pyqtSignal(dict)   # account_info dict
     
     # 连接状态信号
@@ -26,6 +108,7 @@ class SignalBridge(QObject):
     
     # 日志信号
     log_received = pyqtSignal(str, int)  # (message, level)
+    logs_batch_received = pyqtSignal(list)  # [(level_name, log_entry)]
     
     # 策略信号
     strategy_status_changed = pyqtSignal(str, str)  # (strategy_id, status)
@@ -35,10 +118,13 @@ class SignalBridge(QObject):
     
     def __init__(self):
         super().__init__()
+        # 高频数据攒批发送，减少跨线程信号投递次数
+        self._tick_batcher = SignalBatcher(self.ticks_received, max_size=50, interval=0.02)
+        self._log_batcher = SignalBatcher(self.logs_batch_received, max_size=200, interval=0.05)
     
     def emit_tick(self, tick: TickData):
-        """发送Tick数据信号"""
-        self.tick_received.emit(tick)
+        """发送Tick数据信号（攒批后发送）"""
+        self._tick_batcher.add(tick)
     
     def emit_bar(self, bar: KlineData):
         """发送K线数据信号"""
@@ -49,8 +135,8 @@ class SignalBridge(QObject):
         self.order_updated.emit(order)
     
     def emit_position(self, position: Position):
-        """发送持仓更新信号"""
-        self.position_updated.emit(position)
+        """发送持仓更新信号（转换为轻量快照后发送）"""
+        self.position_updated.emit(PositionUpdate.from_position(position))
     
     def emit_account(self, account_info: Dict[str, Any]):
         """发送账户更新信号"""
@@ -64,6 +150,14 @@ class SignalBridge(QObject):
         """发送日志信号"""
         self.log_received.emit(message, level)
     
+    def emit_log_entry(self, level_name: str, log_entry: str):
+        """发送一条已格式化的日志（攒批后发送）"""
+        self._log_batcher.add((level_name, log_entry))
+    
+    def flush_logs(self):
+        """立即发送尚未发出的日志"""
+        self._log_batcher.flush()
+    
     def emit_strategy_status(self, strategy_id: str, status: str):
         """发送策略状态信号"""
         self.strategy_status_changed.emit(strategy_id, status)
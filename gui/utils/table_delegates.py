@@ -0,0 +1,85 @@
+"""
+表格委托 - 减少表格绘制时对模型data()的调用、绘制操作按钮
+"""
+from PyQt6.QtCore import Qt, QEvent, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QPalette
+from PyQt6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton,
+    QStyleOptionViewItem, QTableView
+)
+from typing import Any, Dict, Tuple
+
+from gui.utils.table_models import PAINT_DATA_ROLE
+
+
+class CachedRoleDelegate(QStyledItemDelegate):
+    """
+    一次取出单元格绘制所需的全部角色数据并缓存
+
+    QStyledItemDelegate默认每绘制一个单元格要按字体、对齐、前景色、
+    勾选、图标、文本、背景等角色分别调用data()。这里改为通过
+    PAINT_DATA_ROLE一次取回文本和前景色，并按单元格缓存，模型数据
+    变化时清空缓存。模型需为RecordTableModel。
+    """
+
+    def __init__(self, view: QTableView):
+        super().__init__(view)
+        self._cache: Dict[Tuple[int, int], Dict[int, Any]] = {}
+        model = view.model()
+        model.dataChanged.connect(self.clear_cache)
+        model.modelReset.connect(self.clear_cache)
+        model.rowsInserted.connect(self.clear_cache)
+        model.rowsRemoved.connect(self.clear_cache)
+        model.layoutChanged.connect(self.clear_cache)
+
+    def clear_cache(self, *args):
+        """清空缓存（连接到模型的数据变化信号）"""
+        self._cache.clear()
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex):
+        key = (index.row(), index.column())
+        values = self._cache.get(key)
+        if values is None:
+            values = self._cache[key] = index.data(PAINT_DATA_ROLE) or {}
+
+        option.index = index
+        text = values.get(Qt.ItemDataRole.DisplayRole)
+        if text is not None:
+            option.features |= QStyleOptionViewItem.ViewItemFeature.HasDisplay
+            option.text = text
+        foreground = values.get(Qt.ItemDataRole.ForegroundRole)
+        if foreground is not None:
+            option.palette.setBrush(QPalette.ColorRole.Text, foreground)
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """
+    在单元格中绘制按钮，点击时发出clicked(行号)
+
+    按钮文本取单元格的显示文本，文本为空的单元格不绘制按钮。
+    与setCellWidget/setIndexWidget不同，不为每一行创建按钮控件。
+    """
+
+    clicked = pyqtSignal(int)
+
+    def paint(self, painter, option: QStyleOptionViewItem, index: QModelIndex):
+        text = index.data(Qt.ItemDataRole.DisplayRole)
+        if not text:
+            super().paint(painter, option, index)
+            return
+
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = text
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and option.rect.contains(event.position().toPoint())
+                and index.data(Qt.ItemDataRole.DisplayRole)):
+            self.clicked.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
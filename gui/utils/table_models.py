@@ -0,0 +1,338 @@
+"""
+表格数据模型 - 为高频刷新的表格提供QAbstractTableModel实现
+"""
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QBrush
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from gui.utils.theme import Theme
+from gui.utils.signal_bridge import PositionUpdate
+from database.models import TickData
+from trading.order import Order, OrderDirection
+from backtest.portfolio import Direction
+
+_RED = Theme.BRUSH_RED
+_GREEN = Theme.BRUSH_GREEN
+_YELLOW = Theme.BRUSH_YELLOW
+
+# 一次返回绘制所需全部角色数据的自定义角色，值为 {role: value}
+PAINT_DATA_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    只读记录表格模型基类
+
+    记录按最新在前的顺序保存在固定容量的队列中，新增记录只发出
+    rowsInserted/rowsRemoved信号，视图无需整表重建。子类实现
+    display_text（以及可选的foreground）来定义每个单元格的显示内容。
+    """
+
+    HEADERS: Sequence[str] = ()
+
+    def __init__(self, capacity: Optional[int] = None,
+                 display_rows: Optional[int] = None, parent=None):
+        """
+        Args:
+            capacity: 最多保存的记录数，None表示不限
+            display_rows: 最多显示的行数，None表示与capacity相同
+        """
+        super().__init__(parent)
+        self._records: Deque[Any] = deque(maxlen=capacity)
+        self._display_rows = display_rows if display_rows is not None else capacity
+        self._visible = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._visible
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(index.row(), index.column())
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.foreground(index.row(), index.column())
+        if role == PAINT_DATA_ROLE:
+            row, column = index.row(), index.column()
+            return {
+                Qt.ItemDataRole.DisplayRole: self.display_text(row, column),
+                Qt.ItemDataRole.ForegroundRole: self.foreground(row, column),
+            }
+        return None
+
+    def display_text(self, row: int, column: int) -> str:
+        """单元格显示文本"""
+        raise NotImplementedError
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        """单元格前景色，None表示使用默认颜色"""
+        return None
+
+    def record(self, row: int) -> Any:
+        """获取指定行的记录"""
+        return self._records[row]
+
+    def records(self) -> Deque[Any]:
+        """获取全部记录（最新在前）"""
+        return self._records
+
+    def prepend_records(self, records: Sequence[Any]):
+        """
+        在表格顶部插入一批记录
+
+        Args:
+            records: 按到达顺序排列的记录（最后一条最新）
+        """
+        count = len(records)
+        if not count:
+            return
+
+        limit = self._display_rows
+        inserted = count if limit is None else min(count, limit)
+        new_visible = self._visible + inserted if limit is None else min(self._visible + inserted, limit)
+
+        # 先移除被挤出显示范围的底部行，再在顶部插入新行
+        dropped = self._visible + inserted - new_visible
+        if dropped > 0:
+            self.beginRemoveRows(QModelIndex(), self._visible - dropped, self._visible - 1)
+            self._visible -= dropped
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, inserted - 1)
+        self._records.extendleft(records)
+        self._visible += inserted
+        self.endInsertRows()
+
+    def set_records(self, records: Iterable[Any]):
+        """整体替换记录（最新在前）"""
+        self.beginResetModel()
+        self._records.clear()
+        self._records.extend(records)
+        limit = self._display_rows
+        self._visible = len(self._records) if limit is None else min(len(self._records), limit)
+        self.endResetModel()
+
+    def clear(self):
+        """清空记录"""
+        self.set_records(())
+
+
+class KeyedTableModel(RecordTableModel):
+    """
+    按键增量更新的记录表格模型
+
+    新记录追加到末尾，已有记录原地替换并只对该行发出dataChanged，
+    删除记录只移除对应的行。子类实现record_key返回记录的唯一键。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self._rows: Dict[Any, int] = {}  # {记录键: 行号}
+
+    def record_key(self, record: Any) -> Any:
+        """记录的唯一键"""
+        raise NotImplementedError
+
+    def upsert_record(self, record: Any):
+        """新增或更新一条记录"""
+        key = self.record_key(record)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._records)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._records.append(record)
+            self._rows[key] = row
+            self._visible += 1
+            self.endInsertRows()
+        else:
+            self._records[row] = record
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def remove_record(self, key: Any):
+        """按键删除一条记录"""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._records[row]
+        self._visible -= 1
+        for k, r in self._rows.items():
+            if r > row:
+                self._rows[k] = r - 1
+        self.endRemoveRows()
+
+    def set_records(self, records: Iterable[Any]):
+        """整体替换记录"""
+        super().set_records(records)
+        self._rows = {self.record_key(record): i for i, record in enumerate(self._records)}
+
+
+class TickRow(NamedTuple):
+    """Tick表格行：到达时即计算好与上一笔的涨跌和各列显示文本"""
+    tick: TickData
+    change: float
+    change_pct: float
+    texts: Tuple[str, ...]
+
+
+class TickTableModel(RecordTableModel):
+    """Tick数据表格模型"""
+
+    HEADERS = ("时间", "最新价", "涨跌", "涨跌幅", "成交量", "买一价", "卖一价", "持仓量")
+
+    def prepend_records(self, records: Sequence[TickData]):
+        """插入一批Tick，逐笔计算涨跌并预先格式化各列文本"""
+        prev_price = self._records[0].tick.last_price if self._records else None
+        rows = []
+        for tick in records:
+            price = tick.last_price
+            if prev_price is None:
+                change = change_pct = 0.0
+            else:
+                change = price - prev_price
+                change_pct = (change / prev_price * 100) if prev_price > 0 else 0.0
+            texts = (
+                tick.datetime.strftime("%H:%M:%S") if tick.datetime else "",
+                f"{price:.2f}",
+                f"{change:+.2f}",
+                f"{change_pct:+.2f}%",
+                str(tick.volume),
+                f"{tick.bid_price1 or 0:.2f}",
+                f"{tick.ask_price1 or 0:.2f}",
+                str(tick.open_interest),
+            )
+            rows.append(TickRow(tick, change, change_pct, texts))
+            prev_price = price
+        super().prepend_records(rows)
+
+    def display_text(self, row: int, column: int) -> str:
+        return self._records[row].texts[column]
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        if column not in (2, 3):
+            return None
+        change = self._records[row].change
+        if change > 0:
+            return _RED
+        if change < 0:
+            return _GREEN
+        return None
+
+
+class AlertTableModel(RecordTableModel):
+    """风控告警表格模型"""
+
+    HEADERS = ("时间", "类型", "级别", "消息")
+    _KEYS = ("time", "type", "level", "message")
+
+    def display_text(self, row: int, column: int) -> str:
+        alert: Dict[str, str] = self._records[row]
+        return alert[self._KEYS[column]]
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        if column != 2:
+            return None
+        level = self._records[row]['level']
+        if level == 'ERROR':
+            return _RED
+        if level == 'WARNING':
+            return _YELLOW
+        return None
+
+
+class TradeTableModel(RecordTableModel):
+    """成交记录表格模型"""
+
+    HEADERS = ("成交号", "订单号", "合约", "方向", "价格", "数量", "时间")
+
+    def display_text(self, row: int, column: int) -> str:
+        trade: Dict[str, Any] = self._records[row]
+        if column == 0:
+            return trade.get('trade_id', '')
+        if column == 1:
+            return trade.get('order_id', '')
+        if column == 2:
+            return trade.get('symbol', '')
+        if column == 3:
+            return trade.get('direction', '')
+        if column == 4:
+            return f"{trade.get('price', 0):.2f}"
+        if column == 5:
+            return str(trade.get('volume', 0))
+        return trade.get('time', '')
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        if column != 3:
+            return None
+        return _RED if self._records[row].get('direction', '') == "买入" else _GREEN
+
+
+class PositionTableModel(KeyedTableModel):
+    """交易面板持仓表格模型（按合约代码更新）"""
+
+    HEADERS = ("合约", "方向", "数量", "开仓价", "持仓盈亏", "操作")
+    ACTION_COLUMN = 5
+
+    def record_key(self, record: PositionUpdate) -> str:
+        return record.symbol
+
+    def display_text(self, row: int, column: int) -> str:
+        pos: PositionUpdate = self._records[row]
+        if column == 0:
+            return pos.symbol
+        if column == 1:
+            return "多头" if pos.direction == Direction.LONG else "空头"
+        if column == 2:
+            return str(pos.volume)
+        if column == 3:
+            return f"{pos.avg_price:.2f}"
+        if column == 4:
+            # 持仓盈亏需要当前价格，暂时显示0
+            return "0.00"
+        return "平仓"
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        if column != 1:
+            return None
+        return _RED if self._records[row].direction == Direction.LONG else _GREEN
+
+
+class OrderTableModel(KeyedTableModel):
+    """交易面板订单表格模型（按订单号更新）"""
+
+    HEADERS = ("订单号", "合约", "方向", "价格", "数量", "状态", "操作")
+    ACTION_COLUMN = 6
+
+    def record_key(self, record: Order) -> str:
+        return record.order_id
+
+    def display_text(self, row: int, column: int) -> str:
+        order: Order = self._records[row]
+        if column == 0:
+            return order.order_id or ""
+        if column == 1:
+            return order.symbol
+        if column == 2:
+            return "买入" if order.direction == OrderDirection.BUY else "卖出"
+        if column == 3:
+            return f"{order.price:.2f}"
+        if column == 4:
+            return str(order.volume)
+        if column == 5:
+            return order.status.value if hasattr(order.status, 'value') else str(order.status)
+        return "撤单" if order.is_active() else ""
+
+    def foreground(self, row: int, column: int) -> Optional[QBrush]:
+        if column != 2:
+            return None
+        return _RED if self._records[row].direction == OrderDirection.BUY else _GREEN
@@ -0,0 +1,79 @@
+"""
+表格工具 - 表格批量更新和列宽设置辅助
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush
+from PyQt6.QtWidgets import QHeaderView, QTableView, QTableWidget, QTableWidgetItem
+
+
+@contextmanager
+def bulk_update(table: QTableWidget) -> Iterator[QTableWidget]:
+    """
+    批量修改表格期间屏蔽信号、暂停排序和重绘，结束后统一刷新一次
+
+    用法:
+        with bulk_update(self.order_table) as table:
+            table.setRowCount(n)
+            ...
+    """
+    signals_blocked = table.blockSignals(True)
+    sorting_enabled = table.isSortingEnabled()
+    table.setSortingEnabled(False)
+    table.setUpdatesEnabled(False)
+    try:
+        yield table
+    finally:
+        table.setSortingEnabled(sorting_enabled)
+        table.setUpdatesEnabled(True)
+        table.blockSignals(signals_blocked)
+        table.viewport().update()
+
+
+def set_column_widths(table: QTableView, widths: Sequence[int]):
+    """
+    为表格设置固定的初始列宽（可手动调整），最后一列填满剩余宽度
+
+    与ResizeMode.Stretch不同，插入行时不会触发重新计算所有列宽。
+
+    Args:
+        table: 表格
+        widths: 各列宽度（像素）
+    """
+    header = table.horizontalHeader()
+    header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+    for column, width in enumerate(widths):
+        header.resizeSection(column, width)
+    header.setStretchLastSection(True)
+
+
+def set_cell(table: QTableWidget, row: int, column: int, text: str,
+             foreground: Optional[QBrush] = None) -> QTableWidgetItem:
+    """
+    设置单元格文本和前景色，复用单元格中已有的QTableWidgetItem
+
+    只有单元格为空时才创建新的item，整表刷新时不再反复分配和销毁item。
+
+    Args:
+        table: 表格
+        row: 行号
+        column: 列号
+        text: 显示文本
+        foreground: 文字画刷，None表示使用默认颜色
+
+    Returns:
+        单元格的item
+    """
+    item = table.item(row, column)
+    if item is None:
+        item = QTableWidgetItem(text)
+        table.setItem(row, column, item)
+    else:
+        item.setText(text)
+    if foreground is not None:
+        item.setForeground(foreground)
+    else:
+        item.setData(Qt.ItemDataRole.ForegroundRole, None)
+    return item
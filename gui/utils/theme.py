@@ -1,7 +1,8 @@
 """
 主题样式管理
 """
-from PyQt6.QtGui import QColor, QPalette
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QPalette
 from PyQt6.QtWidgets import QApplication
 
 
@@ -17,6 +18,12 @@ class Theme:
     COLOR_TEXT = QColor(255, 255, 255)    # 白色文字
     COLOR_BORDER = QColor(60, 60, 60)     # 边框颜色
     
+    # 表格文字画刷（预先创建并复用，避免每个单元格都构造新的QBrush）
+    BRUSH_RED = QBrush(QColor(Qt.GlobalColor.red))
+    BRUSH_GREEN = QBrush(QColor(Qt.GlobalColor.green))
+    BRUSH_YELLOW = QBrush(QColor(Qt.GlobalColor.yellow))
+    BRUSH_GRAY = QBrush(QColor(Qt.GlobalColor.gray))
+    
     @staticmethod
     def get_dark_style() -> str:
         """获取深色主题样式表"""
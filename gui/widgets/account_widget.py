@@ -3,15 +3,17 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QLabel, QTableWidget, QHeaderView,
     QGroupBox, QGridLayout
 )
 from PyQt6.QtCore import Qt, pyqtSlot
 from typing import Dict, Any, List
 import pyqtgraph as pg
 
-from gui.utils.signal_bridge import SignalBridge
-from backtest.portfolio import Position
+from gui.utils.signal_bridge import SignalBridge, PositionUpdate
+from gui.utils.theme import Theme
+from gui.utils.table_utils import bulk_update, set_cell
+from backtest.portfolio import Direction
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,7 +26,7 @@ class AccountWidget(QWidget):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
         self.account_info: Dict[str, Any] = {}
-        self.positions: List[Position] = []
+        self.positions: Dict[str, PositionUpdate] = {}  # {symbol: PositionUpdate}
         self.equity_history = []  # 资金曲线历史
         self.setup_ui()
         self.setup_connections()
@@ -114,8 +116,12 @@ class AccountWidget(QWidget):
         self.update_account_info()
     
     @pyqtSlot(object)
-    def on_position_updated(self, position: Position):
+    def on_position_updated(self, position: PositionUpdate):
         """持仓更新"""
+        if position.volume > 0:
+            self.positions[position.symbol] = position
+        else:
+            self.positions.pop(position.symbol, None)
         self.update_position_table()
     
     def update_account_info(self):
@@ -153,48 +159,41 @@ class AccountWidget(QWidget):
     
     def update_position_table(self):
         """更新持仓表格"""
+        with bulk_update(self.position_table):
+            self._fill_position_table()
+    
+    def _fill_position_table(self):
+        """填充持仓表格内容"""
         self.position_table.setRowCount(len(self.positions))
         
-        for i, pos in enumerate(self.positions):
+        for i, pos in enumerate(self.positions.values()):
             # 合约
-            self.position_table.setItem(i, 0, QTableWidgetItem(pos.symbol))
+            set_cell(self.position_table, i, 0, pos.symbol)
             
             # 方向
-            direction_str = "多头" if pos.direction.value == "BUY" else "空头"
-            direction_item = QTableWidgetItem(direction_str)
-            if pos.direction.value == "BUY":
-                direction_item.setForeground(Qt.GlobalColor.red)
-            else:
-                direction_item.setForeground(Qt.GlobalColor.green)
-            self.position_table.setItem(i, 1, direction_item)
+            is_long = pos.direction == Direction.LONG
+            set_cell(self.position_table, i, 1, "多头" if is_long else "空头",
+                     Theme.BRUSH_RED if is_long else Theme.BRUSH_GREEN)
             
             # 数量
-            self.position_table.setItem(i, 2, QTableWidgetItem(str(pos.volume)))
+            set_cell(self.position_table, i, 2, str(pos.volume))
             
             # 开仓价
-            self.position_table.setItem(i, 3, QTableWidgetItem(f"{pos.avg_price:.2f}"))
+            set_cell(self.position_table, i, 3, f"{pos.avg_price:.2f}")
             
-            # 当前价（需要从行情获取，暂时显示开仓价）
-            current_price = pos.avg_price
-            self.position_table.setItem(i, 4, QTableWidgetItem(f"{current_price:.2f}"))
+            # 当前价
+            current_price = pos.current_price or pos.avg_price
+            set_cell(self.position_table, i, 4, f"{current_price:.2f}")
             
             # 持仓盈亏
-            pnl = (current_price - pos.avg_price) * pos.volume if pos.direction.value == "BUY" else (pos.avg_price - current_price) * pos.volume
-            pnl_item = QTableWidgetItem(f"{pnl:,.2f}")
-            if pnl > 0:
-                pnl_item.setForeground(Qt.GlobalColor.red)
-            elif pnl < 0:
-                pnl_item.setForeground(Qt.GlobalColor.green)
-            self.position_table.setItem(i, 5, pnl_item)
+            pnl = (current_price - pos.avg_price) * pos.volume if is_long else (pos.avg_price - current_price) * pos.volume
+            set_cell(self.position_table, i, 5, f"{pnl:,.2f}",
+                     Theme.BRUSH_RED if pnl > 0 else Theme.BRUSH_GREEN if pnl < 0 else None)
             
             # 盈亏比例
             pnl_pct = (pnl / (pos.avg_price * pos.volume) * 100) if pos.avg_price * pos.volume > 0 else 0
-            pnl_pct_item = QTableWidgetItem(f"{pnl_pct:+.2f}%")
-            if pnl_pct > 0:
-                pnl_pct_item.setForeground(Qt.GlobalColor.red)
-            elif pnl_pct < 0:
-                pnl_pct_item.setForeground(Qt.GlobalColor.green)
-            self.position_table.setItem(i, 6, pnl_pct_item)
+            set_cell(self.position_table, i, 6, f"{pnl_pct:+.2f}%",
+                     Theme.BRUSH_RED if pnl_pct > 0 else Theme.BRUSH_GREEN if pnl_pct < 0 else None)
     
     def update_equity_curve(self):
         """更新资金曲线"""
@@ -15,6 +15,34 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 各环境的服务器地址在导入时一次性解析，避免每次切换下拉框都重新读取配置
+_ADDR_CACHE = {
+    env_type: settings.get_server_addresses(env_type)
+    for env_type in (settings.CTP_ENV_NORMAL, settings.CTP_ENV_7X24)
+}
+
+# 连接参数输入框与配置项的对应关系：(控件属性名, 配置项名, 默认值)
+_SETTING_FIELDS = (
+    ("broker_id_edit", "CTP_BROKER_ID", ""),
+    ("user_id_edit", "CTP_USER_ID", ""),
+    ("password_edit", "CTP_PASSWORD", ""),
+    ("app_id_edit", "CTP_APP_ID", "simnow_client_test"),
+    ("auth_code_edit", "CTP_AUTH_CODE", "0000000000000000"),
+)
+
+
+def get_cached_server_addresses(env_type: str) -> dict:
+    """获取缓存的服务器地址，未缓存的环境按需解析一次"""
+    addresses = _ADDR_CACHE.get(env_type)
+    if addresses is None:
+        addresses = _ADDR_CACHE[env_type] = settings.get_server_addresses(env_type)
+    return addresses
+
+
+def clear_server_address_cache():
+    """清空服务器地址缓存（运行时修改了地址配置后调用）"""
+    _ADDR_CACHE.clear()
+
 
 class ConnectionWidget(QDialog):
     """连接配置窗口"""
@@ -124,19 +152,15 @@ class ConnectionWidget(QDialog):
     
     def update_server_addresses(self):
         """更新服务器地址显示"""
-        env_type = self.env_combo.currentData()
-        addresses = settings.get_server_addresses(env_type)
+        addresses = get_cached_server_addresses(self.env_combo.currentData())
         self.md_address_label.setText(addresses['md_address'])
         self.trade_address_label.setText(addresses['trade_address'])
     
     def load_settings(self):
         """加载配置"""
         # 从settings加载
-        self.broker_id_edit.setText(settings.CTP_BROKER_ID or "")
-        self.user_id_edit.setText(settings.CTP_USER_ID or "")
-        self.password_edit.setText(settings.CTP_PASSWORD or "")
-        self.app_id_edit.setText(settings.CTP_APP_ID or "simnow_client_test")
-        self.auth_code_edit.setText(settings.CTP_AUTH_CODE or "0000000000000000")
+        for edit_name, setting_name, default in _SETTING_FIELDS:
+            getattr(self, edit_name).setText(getattr(settings, setting_name) or default)
         
         # 设置环境
         env_type = settings.CTP_ENVIRONMENT or "normal"
@@ -167,7 +191,7 @@ class ConnectionWidget(QDialog):
             return
         
         # 获取服务器地址
-        addresses = settings.get_server_addresses(env_type)
+        addresses = get_cached_server_addresses(env_type)
         
         # 构建连接参数
         connection_params = {
@@ -5,7 +5,9 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPlainTextEdit, QComboBox, QPushButton, QGroupBox
 )
-from PyQt6.QtCore import Qt, pyqtSlot
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
+from PyQt6.QtGui import QFont, QTextCursor
+from collections import deque
 from datetime import datetime
 
 from gui.utils.signal_bridge import SignalBridge
@@ -13,6 +15,9 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 日志级别数值到名称的映射
+_LEVEL_NAMES = {10: "DEBUG", 20: "INFO", 30: "WARNING", 40: "ERROR"}
+
 
 class LogWidget(QWidget):
     """日志查看窗口"""
@@ -20,9 +25,18 @@ class LogWidget(QWidget):
     def __init__(self, signal_bridge: SignalBridge, parent=None):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
-        self.log_buffer = []
+        self.log_buffer = deque(maxlen=1000)  # 满后自动丢弃最旧的日志
+        self._current_filter = "全部"
+        self._pending_lines = deque(maxlen=1000)  # 等待下次刷新时写入界面的日志行
+        self._dirty = False
         self.setup_ui()
         self.setup_connections()
+        
+        # 定时批量刷新，避免每条日志都触发一次重绘
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(100)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start()
     
     def setup_ui(self):
         """设置UI"""
@@ -53,6 +67,7 @@ class LogWidget(QWidget):
         
         self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(1000)  # 文档自动丢弃超出的旧行
         self.log_text.setFont(QFont("Consolas", 9))
         self.log_text.setStyleSheet("background-color: #1e1e1e; color: #ffffff;")
         
@@ -64,43 +79,85 @@ class LogWidget(QWidget):
     def setup_connections(self):
         """设置信号连接"""
         self.signal_bridge.log_received.connect(self.on_log_received)
+        self.signal_bridge.logs_batch_received.connect(self.on_logs_batch_received)
     
     @pyqtSlot(str, int)
     def on_log_received(self, message: str, level: int):
         """接收日志"""
-        level_names = {10: "DEBUG", 20: "INFO", 30: "WARNING", 40: "ERROR"}
-        level_name = level_names.get(level, "INFO")
+        level_name = _LEVEL_NAMES.get(level, "INFO")
         
         log_entry = f"[{datetime.now().strftime('%H:%M:%S')}] [{level_name}] {message}"
         self.log_buffer.append((level_name, log_entry))
         
-        if len(self.log_buffer) > 1000:
-            self.log_buffer.pop(0)
+        # 只追加新的行，完整重建只在切换筛选条件时进行
+        if self._current_filter == "全部" or level_name == self._current_filter:
+            self._pending_lines.append(log_entry)
+            self._dirty = True
+    
+    @pyqtSlot(list)
+    def on_logs_batch_received(self, entries: list):
+        """接收一批已格式化的日志 [(level_name, log_entry)]"""
+        self.log_buffer.extend(entries)
         
-        self.update_log_display()
+        current_filter = self._current_filter
+        if current_filter == "全部":
+            self._pending_lines.extend(entry[1] for entry in entries)
+        else:
+            self._pending_lines.extend(entry[1] for entry in entries if entry[0] == current_filter)
+        self._dirty = bool(self._pending_lines)
+    
+    def _flush(self):
+        """将缓冲的日志行一次性写入界面（窗口不可见时继续缓冲）"""
+        if not self._dirty or not self.isVisible():
+            return
+        self._dirty = False
+        
+        self.log_text.setUpdatesEnabled(False)
+        try:
+            self.log_text.appendPlainText("\n".join(self._pending_lines))
+            self._pending_lines.clear()
+        finally:
+            self.log_text.setUpdatesEnabled(True)
+        self.scroll_to_bottom()
+    
+    def showEvent(self, event):
+        """切换回日志页时补上隐藏期间缓冲的日志"""
+        super().showEvent(event)
+        self._flush()
     
     def filter_logs(self):
         """筛选日志"""
+        self._current_filter = self.level_filter.currentText()
+        self._pending_lines.clear()
+        self._dirty = False
         self.update_log_display()
     
     def update_log_display(self):
-        """更新日志显示"""
-        filter_level = self.level_filter.currentText()
+        """重建日志显示"""
+        filter_level = self._current_filter
         
         if filter_level == "全部":
-            filtered_logs = [entry[1] for entry in self.log_buffer]
+            text = "\n".join(entry[1] for entry in self.log_buffer)
         else:
-            filtered_logs = [entry[1] for entry in self.log_buffer if entry[0] == filter_level]
-        
-        self.log_text.setPlainText("\n".join(filtered_logs))
+            text = "\n".join(entry[1] for entry in self.log_buffer if entry[0] == filter_level)
         
-        # 自动滚动到底部
+        # 清空后通过光标一次性写入，超出上限的旧行由文档自动丢弃
+        self.log_text.clear()
+        cursor = self.log_text.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        self.scroll_to_bottom()
+    
+    def scroll_to_bottom(self):
+        """自动滚动到底部"""
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
     
     def clear_logs(self):
         """清空日志"""
         self.log_buffer.clear()
+        self._pending_lines.clear()
+        self._dirty = False
         self.log_text.clear()
 
 
@@ -3,14 +3,17 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QLineEdit, QPushButton, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QGroupBox
+    QLabel, QLineEdit, QPushButton, QComboBox, QTableView,
+    QGroupBox
 )
-from PyQt6.QtCore import Qt, pyqtSlot
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
 from typing import List, Optional
 from datetime import datetime
+from queue import Queue, Empty, Full
 
 from gui.utils.signal_bridge import SignalBridge
+from gui.utils.table_models import TickTableModel
+from gui.utils.table_utils import set_column_widths
 from gui.charts.kline_chart import KlineChartWidget
 from database.models import TickData, KlineData
 from utils.logger import get_logger
@@ -26,9 +29,18 @@ class MarketDataWidget(QWidget):
         self.signal_bridge = signal_bridge
         self.main_window = parent  # 保存主窗口引用
         self.current_symbol: str = ""
-        self.tick_data: List[TickData] = []
+        # Tick数据（保留最近100条，显示最新的20条，最新的在前）
+        self.tick_model = TickTableModel(capacity=100, display_rows=20, parent=self)
+        # 等待插入表格的Tick（有界队列，满时丢弃最旧的）
+        self._tick_queue: "Queue[TickData]" = Queue(maxsize=500)
         self.setup_ui()
         self.setup_connections()
+        
+        # 定时批量刷新，行情密集时每个周期只更新一次表格
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start()
     
     def setup_ui(self):
         """设置UI"""
@@ -75,12 +87,9 @@ class MarketDataWidget(QWidget):
         tick_group = QGroupBox("实时Tick数据")
         tick_layout = QVBoxLayout()
         
-        self.tick_table = QTableWidget()
-        self.tick_table.setColumnCount(8)
-        self.tick_table.setHorizontalHeaderLabels([
-            "时间", "最新价", "涨跌", "涨跌幅", "成交量", "买一价", "卖一价", "持仓量"
-        ])
-        self.tick_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.tick_table = QTableView()
+        self.tick_table.setModel(self.tick_model)
+        set_column_widths(self.tick_table, (80, 80, 70, 70, 80, 80, 80, 80))
         self.tick_table.setAlternatingRowColors(True)
         self.tick_table.setMaximumHeight(200)
         
@@ -95,22 +104,58 @@ class MarketDataWidget(QWidget):
     
     def setup_connections(self):
         """设置信号连接"""
-        self.signal_bridge.tick_received.connect(self.on_tick_received)
+        # Tick批次直接在发送线程中入队，不经过Qt事件队列，由定时器统一取出刷新
+        self.signal_bridge.ticks_received.connect(
+            self.on_ticks_received, Qt.ConnectionType.DirectConnection
+        )
         self.signal_bridge.bar_received.connect(self.on_bar_received)
     
-    @pyqtSlot(object)
-    def on_tick_received(self, tick: TickData):
-        """接收Tick数据"""
-        if not tick or tick.symbol != self.current_symbol:
+    @pyqtSlot(list)
+    def on_ticks_received(self, ticks: list):
+        """接收一批Tick数据（可能在行情线程中调用，只做入队）"""
+        symbol = self.current_symbol
+        tick_queue = self._tick_queue
+        for tick in ticks:
+            if not tick or tick.symbol != symbol:
+                continue
+            try:
+                tick_queue.put_nowait(tick)
+            except Full:
+                # 队列已满，丢弃最旧的Tick
+                try:
+                    tick_queue.get_nowait()
+                except Empty:
+                    pass
+                try:
+                    tick_queue.put_nowait(tick)
+                except Full:
+                    pass
+    
+    def _drain_ticks(self) -> List[TickData]:
+        """取出队列中所有待显示的Tick（按到达顺序）"""
+        ticks = []
+        while True:
+            try:
+                ticks.append(self._tick_queue.get_nowait())
+            except Empty:
+                break
+        return ticks
+    
+    def _flush(self):
+        """有新Tick时刷新表格（窗口不可见时继续缓冲）"""
+        if self._tick_queue.empty() or not self.isVisible():
             return
         
-        # 添加到列表（保留最近100条）
-        self.tick_data.insert(0, tick)
-        if len(self.tick_data) > 100:
-            self.tick_data.pop()
-        
-        # 更新表格
-        self.update_tick_table()
+        self.tick_table.setUpdatesEnabled(False)
+        try:
+            self.update_tick_table()
+        finally:
+            self.tick_table.setUpdatesEnabled(True)
+    
+    def showEvent(self, event):
+        """切换回行情页时补上隐藏期间缓冲的Tick"""
+        super().showEvent(event)
+        self._flush()
     
     @pyqtSlot(object)
     def on_bar_received(self, bar: KlineData):
@@ -129,8 +174,8 @@ class MarketDataWidget(QWidget):
         
         self.current_symbol = symbol
         self.kline_chart.current_symbol = symbol
-        self.tick_data.clear()
-        self.tick_table.setRowCount(0)
+        self._drain_ticks()
+        self.tick_model.clear()
         self.kline_chart.clear()
         
         # 通过主窗口获取business_logic并订阅
@@ -152,67 +197,17 @@ class MarketDataWidget(QWidget):
         if self.current_symbol:
             logger.info(f"取消订阅合约: {self.current_symbol}")
             self.current_symbol = ""
-            self.tick_data.clear()
-            self.tick_table.setRowCount(0)
+            self._drain_ticks()
+            self.tick_model.clear()
             self.kline_chart.clear()
     
     def update_tick_table(self):
-        """更新Tick数据表格"""
-        if not self.tick_data:
+        """将待显示的Tick一次性插入表格"""
+        ticks = self._drain_ticks()
+        if not ticks:
             return
         
-        # 只显示最新的20条
-        display_count = min(20, len(self.tick_data))
-        self.tick_table.setRowCount(display_count)
-        
-        for i, tick in enumerate(self.tick_data[:display_count]):
-            # 时间
-            time_str = tick.datetime.strftime("%H:%M:%S") if tick.datetime else ""
-            self.tick_table.setItem(i, 0, QTableWidgetItem(time_str))
-            
-            # 最新价
-            price_item = QTableWidgetItem(f"{tick.last_price:.2f}")
-            self.tick_table.setItem(i, 1, price_item)
-            
-            # 涨跌（需要与上一个价格比较）
-            if i < len(self.tick_data) - 1:
-                prev_tick = self.tick_data[i + 1]
-                price_change = tick.last_price - prev_tick.last_price
-                price_change_pct = (price_change / prev_tick.last_price * 100) if prev_tick.last_price > 0 else 0
-            else:
-                price_change = 0
-                price_change_pct = 0
-            
-            # 涨跌
-            change_item = QTableWidgetItem(f"{price_change:+.2f}")
-            if price_change > 0:
-                change_item.setForeground(Qt.GlobalColor.red)
-            elif price_change < 0:
-                change_item.setForeground(Qt.GlobalColor.green)
-            self.tick_table.setItem(i, 2, change_item)
-            
-            # 涨跌幅
-            change_pct_item = QTableWidgetItem(f"{price_change_pct:+.2f}%")
-            if price_change_pct > 0:
-                change_pct_item.setForeground(Qt.GlobalColor.red)
-            elif price_change_pct < 0:
-                change_pct_item.setForeground(Qt.GlobalColor.green)
-            self.tick_table.setItem(i, 3, change_pct_item)
-            
-            # 成交量
-            self.tick_table.setItem(i, 4, QTableWidgetItem(str(tick.volume)))
-            
-            # 买一价
-            bid_price = tick.bid_price1 if tick.bid_price1 else 0
-            self.tick_table.setItem(i, 5, QTableWidgetItem(f"{bid_price:.2f}"))
-            
-            # 卖一价
-            ask_price = tick.ask_price1 if tick.ask_price1 else 0
-            self.tick_table.setItem(i, 6, QTableWidgetItem(f"{ask_price:.2f}"))
-            
-            # 持仓量
-            self.tick_table.setItem(i, 7, QTableWidgetItem(str(tick.open_interest)))
+        self.tick_model.prepend_records(ticks)
         
         # 自动滚动到顶部
         self.tick_table.scrollToTop()
-
@@ -3,18 +3,34 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QLabel, QTableWidget, QTableView,
     QGroupBox, QComboBox
 )
 from PyQt6.QtCore import Qt, pyqtSlot
-from typing import List
+from typing import Dict, List, Optional
 
 from gui.utils.signal_bridge import SignalBridge
+from gui.utils.theme import Theme
+from gui.utils.table_utils import bulk_update, set_cell, set_column_widths
+from gui.utils.table_models import TradeTableModel
 from trading.order import Order, OrderDirection
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 状态筛选项到订单状态值的映射
+_STATUS_MAP = {
+    "已提交": "SUBMITTED",
+    "部分成交": "PARTIAL",
+    "全部成交": "FILLED",
+    "已撤销": "CANCELLED",
+    "已拒绝": "REJECTED"
+}
+
+# 订单方向的显示文本和颜色
+_DIRECTION_TEXT = {OrderDirection.BUY: "买入"}
+_DIRECTION_BRUSH = {OrderDirection.BUY: Theme.BRUSH_RED}
+
 
 class OrderWidget(QWidget):
     """订单管理窗口"""
@@ -23,7 +39,12 @@ class OrderWidget(QWidget):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
         self.orders: List[Order] = []
+        self._order_index: Dict[str, int] = {}  # {order_id: self.orders中的下标}
+        self._row_by_order_id: Dict[str, int] = {}  # {order_id: 表格行号}
+        self._table_stale = False  # 窗口隐藏期间有订单更新，显示时需要重建表格
+        self._filter_status_value: Optional[str] = None  # 当前筛选的订单状态值，None表示全部
         self.trades: List[Dict] = []
+        self.trade_model = TradeTableModel(parent=self)
         self.setup_ui()
         self.setup_connections()
     
@@ -56,7 +77,7 @@ class OrderWidget(QWidget):
         self.order_table.setHorizontalHeaderLabels([
             "订单号", "合约", "方向", "价格", "数量", "已成交", "状态", "时间"
         ])
-        self.order_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        set_column_widths(self.order_table, (260, 80, 60, 80, 60, 60, 90, 80))
         self.order_table.setAlternatingRowColors(True)
         
         order_layout.addWidget(self.order_table)
@@ -67,12 +88,9 @@ class OrderWidget(QWidget):
         trade_group = QGroupBox("成交记录")
         trade_layout = QVBoxLayout()
         
-        self.trade_table = QTableWidget()
-        self.trade_table.setColumnCount(7)
-        self.trade_table.setHorizontalHeaderLabels([
-            "成交号", "订单号", "合约", "方向", "价格", "数量", "时间"
-        ])
-        self.trade_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.trade_table = QTableView()
+        self.trade_table.setModel(self.trade_model)
+        set_column_widths(self.trade_table, (160, 260, 80, 60, 80, 60, 80))
         self.trade_table.setAlternatingRowColors(True)
         
         trade_layout.addWidget(self.trade_table)
@@ -90,94 +108,110 @@ class OrderWidget(QWidget):
     
     @pyqtSlot(object)
     def on_order_updated(self, order: Order):
-        """订单更新"""
-        self.update_order_table()
+        """订单更新（只更新变化的行）"""
+        index = self._order_index.get(order.order_id)
+        if index is None:
+            self._order_index[order.order_id] = len(self.orders)
+            self.orders.append(order)
+        else:
+            self.orders[index] = order
+        
+        if not self.isVisible():
+            self._table_stale = True
+            return
+        
+        table = self.order_table
+        row = self._row_by_order_id.get(order.order_id)
+        matched = self._match_filter(order)
+        if row is None and not matched:
+            return
+        
+        with bulk_update(table):
+            if not matched:
+                # 状态变化后不再满足筛选条件，移除该行
+                table.removeRow(row)
+                del self._row_by_order_id[order.order_id]
+                for order_id, r in self._row_by_order_id.items():
+                    if r > row:
+                        self._row_by_order_id[order_id] = r - 1
+            elif row is None:
+                # 新订单插入到顶部
+                table.insertRow(0)
+                for order_id in self._row_by_order_id:
+                    self._row_by_order_id[order_id] += 1
+                self._row_by_order_id[order.order_id] = 0
+                self._set_order_row(0, order)
+            else:
+                # 已有订单只更新会变化的单元格
+                table.item(row, 5).setText(str(order.filled_volume))
+                table.item(row, 6).setText(self._status_text(order))
+    
+    def showEvent(self, event):
+        """切换回订单页时重建隐藏期间变化的表格"""
+        super().showEvent(event)
+        if self._table_stale:
+            self.update_order_table()
     
     def filter_orders(self):
         """筛选订单"""
+        filter_text = self.status_filter.currentText()
+        self._filter_status_value = None if filter_text == "全部" else _STATUS_MAP.get(filter_text, "")
         self.update_order_table()
     
+    def _match_filter(self, order: Order) -> bool:
+        """判断订单是否满足当前筛选条件"""
+        status_value = self._filter_status_value
+        return status_value is None or order.status.value == status_value
+    
+    @staticmethod
+    def _status_text(order: Order) -> str:
+        """订单状态显示文本"""
+        return order.status.value if hasattr(order.status, 'value') else str(order.status)
+    
     def update_order_table(self):
-        """更新订单表格"""
-        filter_text = self.status_filter.currentText()
-        
-        if filter_text == "全部":
-            filtered_orders = self.orders
+        """重建订单表格（最新的订单在前）"""
+        self._table_stale = False
+        status_value = self._filter_status_value
+        if status_value is None:
+            filtered_orders = self.orders[::-1]
         else:
-            status_map = {
-                "已提交": "SUBMITTED",
-                "部分成交": "PARTIAL",
-                "全部成交": "FILLED",
-                "已撤销": "CANCELLED",
-                "已拒绝": "REJECTED"
-            }
-            target_status = status_map.get(filter_text, "")
-            filtered_orders = [o for o in self.orders if o.status.value == target_status]
-        
-        self.order_table.setRowCount(len(filtered_orders))
-        
-        for i, order in enumerate(filtered_orders):
-            # 订单号
-            self.order_table.setItem(i, 0, QTableWidgetItem(order.order_id or ""))
-            
-            # 合约
-            self.order_table.setItem(i, 1, QTableWidgetItem(order.symbol))
-            
-            # 方向
-            direction_str = "买入" if order.direction == OrderDirection.BUY else "卖出"
-            direction_item = QTableWidgetItem(direction_str)
-            if order.direction == OrderDirection.BUY:
-                direction_item.setForeground(Qt.GlobalColor.red)
-            else:
-                direction_item.setForeground(Qt.GlobalColor.green)
-            self.order_table.setItem(i, 2, direction_item)
-            
-            # 价格
-            self.order_table.setItem(i, 3, QTableWidgetItem(f"{order.price:.2f}"))
-            
-            # 数量
-            self.order_table.setItem(i, 4, QTableWidgetItem(str(order.volume)))
-            
-            # 已成交
-            self.order_table.setItem(i, 5, QTableWidgetItem(str(order.filled_volume)))
-            
-            # 状态
-            status_str = order.status.value if hasattr(order.status, 'value') else str(order.status)
-            self.order_table.setItem(i, 6, QTableWidgetItem(status_str))
-            
-            # 时间
-            time_str = order.submit_time.strftime("%H:%M:%S") if order.submit_time else ""
-            self.order_table.setItem(i, 7, QTableWidgetItem(time_str))
+            filtered_orders = [o for o in reversed(self.orders) if o.status.value == status_value]
+        
+        with bulk_update(self.order_table) as table:
+            table.setRowCount(len(filtered_orders))
+            self._row_by_order_id = {}
+            for i, order in enumerate(filtered_orders):
+                self._row_by_order_id[order.order_id] = i
+                self._set_order_row(i, order)
+    
+    def _set_order_row(self, i: int, order: Order):
+        """填充一行订单数据"""
+        # 订单号
+        set_cell(self.order_table, i, 0, order.order_id or "")
+        
+        # 合约
+        set_cell(self.order_table, i, 1, order.symbol)
+        
+        # 方向
+        set_cell(self.order_table, i, 2, _DIRECTION_TEXT.get(order.direction, "卖出"),
+                 _DIRECTION_BRUSH.get(order.direction, Theme.BRUSH_GREEN))
+        
+        # 价格
+        set_cell(self.order_table, i, 3, f"{order.price:.2f}")
+        
+        # 数量
+        set_cell(self.order_table, i, 4, str(order.volume))
+        
+        # 已成交
+        set_cell(self.order_table, i, 5, str(order.filled_volume))
+        
+        # 状态
+        set_cell(self.order_table, i, 6, self._status_text(order))
+        
+        # 时间
+        time_str = order.submit_time.strftime("%H:%M:%S") if order.submit_time else ""
+        set_cell(self.order_table, i, 7, time_str)
     
     def update_trade_table(self):
-        """更新成交记录表格"""
-        self.trade_table.setRowCount(len(self.trades))
-        
-        for i, trade in enumerate(self.trades):
-            # 成交号
-            self.trade_table.setItem(i, 0, QTableWidgetItem(trade.get('trade_id', '')))
-            
-            # 订单号
-            self.trade_table.setItem(i, 1, QTableWidgetItem(trade.get('order_id', '')))
-            
-            # 合约
-            self.trade_table.setItem(i, 2, QTableWidgetItem(trade.get('symbol', '')))
-            
-            # 方向
-            direction_str = trade.get('direction', '')
-            direction_item = QTableWidgetItem(direction_str)
-            if direction_str == "买入":
-                direction_item.setForeground(Qt.GlobalColor.red)
-            else:
-                direction_item.setForeground(Qt.GlobalColor.green)
-            self.trade_table.setItem(i, 3, direction_item)
-            
-            # 价格
-            self.trade_table.setItem(i, 4, QTableWidgetItem(f"{trade.get('price', 0):.2f}"))
-            
-            # 数量
-            self.trade_table.setItem(i, 5, QTableWidgetItem(str(trade.get('volume', 0))))
-            
-            # 时间
-            self.trade_table.setItem(i, 6, QTableWidgetItem(trade.get('time', '')))
-
+        """更新成交记录表格（最新的成交在前）"""
+        self.trade_model.set_records(reversed(self.trades))
@@ -3,13 +3,16 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QLabel, QTableView,
     QGroupBox, QGridLayout
 )
-from PyQt6.QtCore import Qt, pyqtSlot
-from typing import List, Dict
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
+from typing import Deque, Dict
+from collections import deque
 
 from gui.utils.signal_bridge import SignalBridge
+from gui.utils.table_models import AlertTableModel
+from gui.utils.table_utils import set_column_widths
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -21,9 +24,17 @@ class RiskWidget(QWidget):
     def __init__(self, signal_bridge: SignalBridge, parent=None):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
-        self.alerts: List[Dict[str, str]] = []
+        # 告警记录（保留最近100条，最新的在前）
+        self.alert_model = AlertTableModel(capacity=100, parent=self)
+        self._pending_alerts: Deque[Dict[str, str]] = deque(maxlen=100)  # 等待下次刷新时插入表格的告警
         self.setup_ui()
         self.setup_connections()
+        
+        # 定时批量刷新，避免告警密集时逐条重建表格
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(100)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start()
     
     def setup_ui(self):
         """设置UI"""
@@ -57,12 +68,9 @@ class RiskWidget(QWidget):
         alert_group = QGroupBox("告警信息")
         alert_layout = QVBoxLayout()
         
-        self.alert_table = QTableWidget()
-        self.alert_table.setColumnCount(4)
-        self.alert_table.setHorizontalHeaderLabels([
-            "时间", "类型", "级别", "消息"
-        ])
-        self.alert_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.alert_table = QTableView()
+        self.alert_table.setModel(self.alert_model)
+        set_column_widths(self.alert_table, (80, 120, 80, 300))
         self.alert_table.setAlternatingRowColors(True)
         
         alert_layout.addWidget(self.alert_table)
@@ -88,31 +96,28 @@ class RiskWidget(QWidget):
             'level': 'WARNING',
             'message': message
         }
-        self.alerts.insert(0, alert)
-        if len(self.alerts) > 100:
-            self.alerts.pop()
+        self._pending_alerts.append(alert)
+    
+    def _flush(self):
+        """有新告警时刷新表格（窗口不可见时继续缓冲）"""
+        if not self._pending_alerts or not self.isVisible():
+            return
         
-        self.update_alert_table()
+        self.alert_table.setUpdatesEnabled(False)
+        try:
+            self.update_alert_table()
+        finally:
+            self.alert_table.setUpdatesEnabled(True)
+    
+    def showEvent(self, event):
+        """切换回风控页时补上隐藏期间缓冲的告警"""
+        super().showEvent(event)
+        self._flush()
     
     def update_alert_table(self):
-        """更新告警表格"""
-        self.alert_table.setRowCount(len(self.alerts))
+        """将待显示的告警插入表格"""
+        if not self._pending_alerts:
+            return
         
-        for i, alert in enumerate(self.alerts):
-            # 时间
-            self.alert_table.setItem(i, 0, QTableWidgetItem(alert['time']))
-            
-            # 类型
-            self.alert_table.setItem(i, 1, QTableWidgetItem(alert['type']))
-            
-            # 级别
-            level_item = QTableWidgetItem(alert['level'])
-            if alert['level'] == 'ERROR':
-                level_item.setForeground(Qt.GlobalColor.red)
-            elif alert['level'] == 'WARNING':
-                level_item.setForeground(Qt.GlobalColor.yellow)
-            self.alert_table.setItem(i, 2, level_item)
-            
-            # 消息
-            self.alert_table.setItem(i, 3, QTableWidgetItem(alert['message']))
-
+        self.alert_model.prepend_records(self._pending_alerts)
+        self._pending_alerts.clear()
@@ -3,14 +3,16 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QLabel, QTableWidget, QHeaderView,
     QGroupBox, QPushButton, QLineEdit, QDialog, QFormLayout,
     QDialogButtonBox, QMessageBox
 )
-from PyQt6.QtCore import Qt, pyqtSlot
+from PyQt6.QtCore import Qt, QSignalMapper, pyqtSlot
 from typing import Dict, Any, List
 
 from gui.utils.signal_bridge import SignalBridge
+from gui.utils.theme import Theme
+from gui.utils.table_utils import bulk_update, set_cell
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,6 +25,7 @@ class StrategyWidget(QWidget):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
         self.strategies: List[Dict[str, Any]] = []
+        self._action_buttons: Dict[int, QPushButton] = {}  # {行号: 启停按钮}，按行复用
         self.setup_ui()
         self.setup_connections()
     
@@ -63,6 +66,10 @@ class StrategyWidget(QWidget):
         self.strategy_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.strategy_table.setAlternatingRowColors(True)
         
+        # 所有行的启停按钮共用一个映射器，按行号分发
+        self._action_mapper = QSignalMapper(self)
+        self._action_mapper.mappedInt.connect(self.on_strategy_action)
+        
         strategy_layout.addWidget(self.strategy_table)
         strategy_group.setLayout(strategy_layout)
         
@@ -110,38 +117,49 @@ class StrategyWidget(QWidget):
     
     def update_strategy_table(self):
         """更新策略表格"""
-        self.strategy_table.setRowCount(len(self.strategies))
-        
-        for i, strategy in enumerate(self.strategies):
-            # 策略ID
-            self.strategy_table.setItem(i, 0, QTableWidgetItem(strategy.get('id', '')))
-            
-            # 策略名称
-            self.strategy_table.setItem(i, 1, QTableWidgetItem(strategy.get('name', '')))
-            
-            # 状态
-            status = strategy.get('status', 'STOPPED')
-            status_item = QTableWidgetItem(status)
-            if status == 'RUNNING':
-                status_item.setForeground(Qt.GlobalColor.green)
-            else:
-                status_item.setForeground(Qt.GlobalColor.gray)
-            self.strategy_table.setItem(i, 2, status_item)
+        with bulk_update(self.strategy_table):
+            # 被删除的行上的按钮会随行一起销毁，先解除映射
+            for row in [r for r in self._action_buttons if r >= len(self.strategies)]:
+                self._action_mapper.removeMappings(self._action_buttons.pop(row))
+            self.strategy_table.setRowCount(len(self.strategies))
             
-            # 参数
-            params = strategy.get('params', {})
-            params_str = ', '.join([f"{k}={v}" for k, v in params.items()])
-            self.strategy_table.setItem(i, 3, QTableWidgetItem(params_str))
-            
-            # 操作按钮
-            if status == 'RUNNING':
-                stop_btn = QPushButton("停止")
-                stop_btn.clicked.connect(lambda checked, s=strategy: self.stop_strategy(s))
-                self.strategy_table.setCellWidget(i, 4, stop_btn)
-            else:
-                start_btn = QPushButton("启动")
-                start_btn.clicked.connect(lambda checked, s=strategy: self.start_strategy(s))
-                self.strategy_table.setCellWidget(i, 4, start_btn)
+            for i, strategy in enumerate(self.strategies):
+                # 策略ID
+                set_cell(self.strategy_table, i, 0, strategy.get('id', ''))
+                
+                # 策略名称
+                set_cell(self.strategy_table, i, 1, strategy.get('name', ''))
+                
+                # 状态
+                status = strategy.get('status', 'STOPPED')
+                set_cell(self.strategy_table, i, 2, status,
+                         Theme.BRUSH_GREEN if status == 'RUNNING' else Theme.BRUSH_GRAY)
+                
+                # 参数
+                params = strategy.get('params', {})
+                params_str = ', '.join([f"{k}={v}" for k, v in params.items()])
+                set_cell(self.strategy_table, i, 3, params_str)
+                
+                # 操作按钮（每行只创建一次，之后只更新文字）
+                action_btn = self._action_buttons.get(i)
+                if action_btn is None:
+                    action_btn = QPushButton()
+                    action_btn.clicked.connect(self._action_mapper.map)
+                    self._action_mapper.setMapping(action_btn, i)
+                    self._action_buttons[i] = action_btn
+                    self.strategy_table.setCellWidget(i, 4, action_btn)
+                action_btn.setText("停止" if status == 'RUNNING' else "启动")
+    
+    @pyqtSlot(int)
+    def on_strategy_action(self, row: int):
+        """启停按钮点击"""
+        if row >= len(self.strategies):
+            return
+        strategy = self.strategies[row]
+        if strategy.get('status', 'STOPPED') == 'RUNNING':
+            self.stop_strategy(strategy)
+        else:
+            self.start_strategy(strategy)
     
     def start_strategy(self, strategy: Dict[str, Any]):
         """启动策略"""
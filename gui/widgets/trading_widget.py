@@ -3,17 +3,19 @@
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QLabel, QLineEdit, QPushButton, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QGroupBox, QDoubleSpinBox,
+    QLabel, QLineEdit, QPushButton, QComboBox, QTableView,
+    QGroupBox, QDoubleSpinBox,
     QSpinBox, QMessageBox
 )
-from PyQt6.QtCore import Qt, pyqtSlot
-from typing import List, Optional
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
+from typing import Dict, List, Optional
 from datetime import datetime
 
-from gui.utils.signal_bridge import SignalBridge
+from gui.utils.signal_bridge import SignalBridge, PositionUpdate
+from gui.utils.table_utils import set_column_widths
+from gui.utils.table_models import PositionTableModel, OrderTableModel
+from gui.utils.table_delegates import ActionButtonDelegate, CachedRoleDelegate
 from trading.order import Order, OrderType, OrderDirection
-from backtest.portfolio import Position
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -25,10 +27,22 @@ class TradingWidget(QWidget):
     def __init__(self, signal_bridge: SignalBridge, parent=None):
         super().__init__(parent)
         self.signal_bridge = signal_bridge
-        self.positions: List[Position] = []
+        self.positions: Dict[str, PositionUpdate] = {}  # {symbol: PositionUpdate}
         self.orders: List[Order] = []
+        self._order_index: Dict[str, int] = {}  # {order_id: self.orders中的下标}
+        self.position_model = PositionTableModel(parent=self)
+        self.order_model = OrderTableModel(parent=self)
+        # 等待下次刷新时写入表格的更新，同一持仓/订单只保留最新一次
+        self._pending_positions: Dict[str, PositionUpdate] = {}
+        self._pending_orders: Dict[str, Order] = {}
         self.setup_ui()
         self.setup_connections()
+        
+        # 突发的更新合并到一次刷新中，每50ms最多刷新一次表格
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush)
     
     def setup_ui(self):
         """设置UI"""
@@ -113,12 +127,13 @@ class TradingWidget(QWidget):
         position_group = QGroupBox("持仓")
         position_layout = QVBoxLayout()
         
-        self.position_table = QTableWidget()
-        self.position_table.setColumnCount(6)
-        self.position_table.setHorizontalHeaderLabels([
-            "合约", "方向", "数量", "开仓价", "持仓盈亏", "操作"
-        ])
-        self.position_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.position_table = QTableView()
+        self.position_table.setModel(self.position_model)
+        self.position_table.setItemDelegate(CachedRoleDelegate(self.position_table))
+        close_delegate = ActionButtonDelegate(self.position_table)
+        close_delegate.clicked.connect(self.on_close_clicked)
+        self.position_table.setItemDelegateForColumn(PositionTableModel.ACTION_COLUMN, close_delegate)
+        set_column_widths(self.position_table, (80, 60, 60, 80, 90, 60))
         self.position_table.setAlternatingRowColors(True)
         
         position_layout.addWidget(self.position_table)
@@ -129,12 +144,13 @@ class TradingWidget(QWidget):
         order_group = QGroupBox("订单")
         order_layout = QVBoxLayout()
         
-        self.order_table = QTableWidget()
-        self.order_table.setColumnCount(7)
-        self.order_table.setHorizontalHeaderLabels([
-            "订单号", "合约", "方向", "价格", "数量", "状态", "操作"
-        ])
-        self.order_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.order_table = QTableView()
+        self.order_table.setModel(self.order_model)
+        self.order_table.setItemDelegate(CachedRoleDelegate(self.order_table))
+        cancel_delegate = ActionButtonDelegate(self.order_table)
+        cancel_delegate.clicked.connect(self.on_cancel_clicked)
+        self.order_table.setItemDelegateForColumn(OrderTableModel.ACTION_COLUMN, cancel_delegate)
+        set_column_widths(self.order_table, (260, 80, 60, 80, 60, 90, 60))
         self.order_table.setAlternatingRowColors(True)
         
         order_layout.addWidget(self.order_table)
@@ -153,16 +169,52 @@ class TradingWidget(QWidget):
         self.signal_bridge.order_updated.connect(self.on_order_updated)
     
     @pyqtSlot(object)
-    def on_position_updated(self, position: Position):
-        """持仓更新"""
-        # 更新持仓列表
-        self.update_position_table()
+    def on_position_updated(self, position: PositionUpdate):
+        """持仓更新（表格在下次刷新时只更新变化的行）"""
+        if position.volume > 0:
+            self.positions[position.symbol] = position
+        else:
+            self.positions.pop(position.symbol, None)
+        self._pending_positions[position.symbol] = position
+        self._schedule_flush()
     
     @pyqtSlot(object)
     def on_order_updated(self, order: Order):
-        """订单更新"""
-        # 更新订单列表
-        self.update_order_table()
+        """订单更新（表格在下次刷新时只更新变化的行）"""
+        index = self._order_index.get(order.order_id)
+        if index is None:
+            self._order_index[order.order_id] = len(self.orders)
+            self.orders.append(order)
+        else:
+            self.orders[index] = order
+        self._pending_orders[order.order_id] = order
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """安排一次表格刷新（已安排时不重复）"""
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+    
+    def _flush(self):
+        """把缓冲的持仓和订单更新写入表格（窗口不可见时继续缓冲）"""
+        if not self.isVisible():
+            return
+        
+        for symbol, position in self._pending_positions.items():
+            if position.volume > 0:
+                self.position_model.upsert_record(position)
+            else:
+                self.position_model.remove_record(symbol)
+        self._pending_positions.clear()
+        
+        for order in self._pending_orders.values():
+            self.order_model.upsert_record(order)
+        self._pending_orders.clear()
+    
+    def showEvent(self, event):
+        """切换回交易页时补上隐藏期间缓冲的更新"""
+        super().showEvent(event)
+        self._flush()
     
     def submit_order(self, direction: OrderDirection):
         """提交订单"""
@@ -190,76 +242,26 @@ class TradingWidget(QWidget):
         QMessageBox.information(self, "提示", f"订单已提交: {symbol} {direction.value} {volume}手 @ {price}")
     
     def update_position_table(self):
-        """更新持仓表格"""
-        self.position_table.setRowCount(len(self.positions))
-        
-        for i, pos in enumerate(self.positions):
-            # 合约
-            self.position_table.setItem(i, 0, QTableWidgetItem(pos.symbol))
-            
-            # 方向
-            direction_str = "多头" if pos.direction == OrderDirection.BUY else "空头"
-            direction_item = QTableWidgetItem(direction_str)
-            if pos.direction == OrderDirection.BUY:
-                direction_item.setForeground(Qt.GlobalColor.red)
-            else:
-                direction_item.setForeground(Qt.GlobalColor.green)
-            self.position_table.setItem(i, 1, direction_item)
-            
-            # 数量
-            self.position_table.setItem(i, 2, QTableWidgetItem(str(pos.volume)))
-            
-            # 开仓价
-            self.position_table.setItem(i, 3, QTableWidgetItem(f"{pos.avg_price:.2f}"))
-            
-            # 持仓盈亏（需要当前价格，暂时显示0）
-            pnl_item = QTableWidgetItem("0.00")
-            self.position_table.setItem(i, 4, pnl_item)
-            
-            # 操作按钮
-            close_btn = QPushButton("平仓")
-            close_btn.clicked.connect(lambda checked, p=pos: self.close_position(p))
-            self.position_table.setCellWidget(i, 5, close_btn)
+        """重建持仓表格"""
+        self._pending_positions.clear()
+        self.position_model.set_records(self.positions.values())
     
     def update_order_table(self):
-        """更新订单表格"""
-        self.order_table.setRowCount(len(self.orders))
-        
-        for i, order in enumerate(self.orders):
-            # 订单号
-            self.order_table.setItem(i, 0, QTableWidgetItem(order.order_id or ""))
-            
-            # 合约
-            self.order_table.setItem(i, 1, QTableWidgetItem(order.symbol))
-            
-            # 方向
-            direction_str = "买入" if order.direction == OrderDirection.BUY else "卖出"
-            direction_item = QTableWidgetItem(direction_str)
-            if order.direction == OrderDirection.BUY:
-                direction_item.setForeground(Qt.GlobalColor.red)
-            else:
-                direction_item.setForeground(Qt.GlobalColor.green)
-            self.order_table.setItem(i, 2, direction_item)
-            
-            # 价格
-            self.order_table.setItem(i, 3, QTableWidgetItem(f"{order.price:.2f}"))
-            
-            # 数量
-            self.order_table.setItem(i, 4, QTableWidgetItem(str(order.volume)))
-            
-            # 状态
-            status_str = order.status.value if hasattr(order.status, 'value') else str(order.status)
-            self.order_table.setItem(i, 5, QTableWidgetItem(status_str))
-            
-            # 操作按钮
-            if order.status.value == "SUBMITTED" or order.status.value == "PARTIAL":
-                cancel_btn = QPushButton("撤单")
-                cancel_btn.clicked.connect(lambda checked, o=order: self.cancel_order(o))
-                self.order_table.setCellWidget(i, 6, cancel_btn)
-            else:
-                self.order_table.setItem(i, 6, QTableWidgetItem(""))
+        """重建订单表格"""
+        self._pending_orders.clear()
+        self.order_model.set_records(self.orders)
+    
+    @pyqtSlot(int)
+    def on_close_clicked(self, row: int):
+        """持仓表格的平仓按钮点击"""
+        self.close_position(self.position_model.record(row))
+    
+    @pyqtSlot(int)
+    def on_cancel_clicked(self, row: int):
+        """订单表格的撤单按钮点击（仅活跃订单显示按钮）"""
+        self.cancel_order(self.order_model.record(row))
     
-    def close_position(self, position: Position):
+    def close_position(self, position: PositionUpdate):
         """平仓"""
         reply = QMessageBox.question(
             self,
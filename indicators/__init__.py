@@ -1,11 +1,12 @@
 """
 技术指标计算库
 """
-from indicators.ma import MA, EMA, SMA
-from indicators.macd import MACD
-from indicators.rsi import RSI
-from indicators.bollinger import BollingerBands
-from indicators.ta_lib import TechnicalIndicators
+from indicators.ma import MA, EMA, SMA, MAState, EMAState
+from indicators.macd import MACD, MACDState
+from indicators.rsi import RSI, RSIState
+from indicators.bollinger import BollingerBands, BollingerState
+from indicators.ta_lib import TechnicalIndicators, to_list_with_none
+from indicators.kline_frame import KlineFrame
 
 __all__ = [
     'MA',
@@ -14,6 +15,13 @@ __all__ = [
     'MACD',
     'RSI',
     'BollingerBands',
+    'MAState',
+    'EMAState',
+    'MACDState',
+    'RSIState',
+    'BollingerState',
     'TechnicalIndicators',
+    'to_list_with_none',
+    'KlineFrame',
 ]
 
@@ -1,56 +1,117 @@
 """
 布林带指标
 """
-from typing import List, Optional, Tuple
-from indicators.ma import SMA
-import statistics
+from collections import deque
+import math
+from typing import Optional, Tuple
+import numpy as np
 
 
-def BollingerBands(prices: List[float],
+def BollingerBands(prices: np.ndarray,
                   period: int = 20,
-                  num_std: float = 2.0) -> Tuple[List[Optional[float]],
-                                                 List[Optional[float]],
-                                                 List[Optional[float]]]:
+                  num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     计算布林带指标
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         period: 周期（默认20）
         num_std: 标准差倍数（默认2.0）
         
     Returns:
-        (上轨, 中轨, 下轨) 元组
+        (上轨, 中轨, 下轨) float64数组元组，前period-1个值（数据不足时为全部）为NaN
     """
-    if len(prices) < period:
-        return ([None] * len(prices),
-                [None] * len(prices),
-                [None] * len(prices))
-    
-    # 计算中轨（SMA）
-    middle_band = SMA(prices, period)
-    
-    # 计算上轨和下轨
-    upper_band = []
-    lower_band = []
-    
-    for i in range(len(prices)):
-        if i < period - 1:
-            upper_band.append(None)
-            lower_band.append(None)
-        else:
-            # 计算标准差
-            period_prices = prices[i - period + 1:i + 1]
-            std = statistics.stdev(period_prices)
-            
-            # 计算上下轨
-            middle = middle_band[i]
-            if middle is not None:
-                upper_band.append(middle + num_std * std)
-                lower_band.append(middle - num_std * std)
-            else:
-                upper_band.append(None)
-                lower_band.append(None)
-    
-    return upper_band, middle_band, lower_band
+    arr = np.asarray(prices, dtype=np.float64)
+    upper = np.full(len(arr), np.nan)
+    middle = np.full(len(arr), np.nan)
+    lower = np.full(len(arr), np.nan)
+    if len(arr) < period:
+        return upper, middle, lower
+    
+    # 用累积和与平方累积和一次性求出所有窗口的均值和样本标准差
+    # 先减去整体均值再累加，避免价格较大时平方和相减损失精度（方差与平移无关）
+    shift = arr.mean()
+    centered = arr - shift
+    cs = np.empty(len(arr) + 1)
+    cs2 = np.empty(len(arr) + 1)
+    cs[0] = cs2[0] = 0.0
+    np.cumsum(centered, out=cs[1:])
+    np.cumsum(centered * centered, out=cs2[1:])
+    
+    mean = (cs[period:] - cs[:-period]) / period
+    mean2 = (cs2[period:] - cs2[:-period]) / period
+    std = np.sqrt(np.maximum(mean2 - mean * mean, 0.0) * (period / (period - 1)))
+    
+    # 中轨（SMA）、上轨、下轨
+    middle[period - 1:] = mean + shift
+    upper[period - 1:] = middle[period - 1:] + num_std * std
+    lower[period - 1:] = middle[period - 1:] - num_std * std
+    return upper, middle, lower
 
+
+class BollingerState:
+    """
+    布林带的增量计算状态
+    
+    以deque保存最近period个价格，并维护窗口内的和与平方和，新价格到达时
+    O(1)更新，与BollingerBands()对同一序列计算的末值一致。
+    """
+    
+    __slots__ = ('period', 'num_std', 'upper', 'middle', 'lower',
+                 '_window', '_sum', '_sum2', '_shift')
+    
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        """
+        初始化
+        
+        Args:
+            period: 周期
+            num_std: 标准差倍数
+        """
+        self.period = period
+        self.num_std = num_std
+        # 最新的上轨、中轨、下轨，数据不足时为NaN
+        self.upper = math.nan
+        self.middle = math.nan
+        self.lower = math.nan
+        self._window = deque(maxlen=period)  # 窗口内减去_shift后的价格
+        self._sum = 0.0
+        self._sum2 = 0.0
+        # 以第一个价格为基准平移后再累加，避免价格较大时平方和相减损失精度
+        self._shift: Optional[float] = None
+    
+    def update(self, price: float) -> Tuple[float, float, float]:
+        """
+        加入一个新价格
+        
+        Args:
+            price: 价格
+            
+        Returns:
+            (上轨, 中轨, 下轨)，数据不足时为NaN
+        """
+        if self._shift is None:
+            self._shift = price
+        window = self._window
+        period = self.period
+        if len(window) == period:
+            old = window[0]
+            self._sum -= old
+            self._sum2 -= old * old
+        x = price - self._shift
+        window.append(x)
+        self._sum += x
+        self._sum2 += x * x
+        if len(window) < period:
+            return self.upper, self.middle, self.lower
+        
+        mean = self._sum / period
+        if period > 1:
+            var = max(self._sum2 / period - mean * mean, 0.0) * (period / (period - 1))
+            std = math.sqrt(var)
+        else:
+            std = math.nan
+        self.middle = mean + self._shift
+        self.upper = self.middle + self.num_std * std
+        self.lower = self.middle - self.num_std * std
+        return self.upper, self.middle, self.lower
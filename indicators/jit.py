@@ -0,0 +1,21 @@
+"""
+指标计算JIT加速（numba可选，未安装时退化为普通Python函数）
+"""
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 尝试导入numba
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.debug("numba未安装，指标递推计算将以普通Python方式运行")
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba.njit的替代：原样返回被装饰的函数"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -0,0 +1,99 @@
+"""
+K线列式数据 - 将KlineData对象列表一次性转换为按列存储的NumPy数组
+"""
+from operator import attrgetter
+from typing import List, NamedTuple, Union
+import numpy as np
+
+from database.models import KlineData
+
+
+class KlineRow(NamedTuple):
+    """KlineFrame中的一行（兼容按属性访问K线字段的旧代码）"""
+    datetime: np.datetime64
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class KlineFrame:
+    """
+    按列存储的K线数据
+
+    每个字段是一个连续的float64数组，指标计算直接使用列数组，
+    不必再逐根K线读取属性。
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, datetime: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.datetime = datetime
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_klines(cls, klines: List[KlineData]) -> "KlineFrame":
+        """
+        从K线对象列表构建（只遍历一次K线对象）
+
+        Args:
+            klines: K线数据列表
+
+        Returns:
+            KlineFrame对象
+        """
+        rows = [(k.open, k.high, k.low, k.close, k.volume or 0) for k in klines]
+        # 转置后复制一次，使每一列在内存中连续
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(cls.COLUMNS)).T.copy()
+        datetimes = np.array([k.datetime for k in klines], dtype='datetime64[ns]')
+        return cls(datetimes, *values)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        获取指定列，未知列名返回收盘价
+
+        Args:
+            name: 列名（'open', 'high', 'low', 'close', 'volume'）
+        """
+        if name not in self.COLUMNS:
+            name = 'close'
+        return getattr(self, name)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, i: int) -> KlineRow:
+        return KlineRow(self.datetime[i], float(self.open[i]), float(self.high[i]),
+                        float(self.low[i]), float(self.close[i]), float(self.volume[i]))
+
+
+KlineSource = Union[List[KlineData], KlineFrame]
+
+
+# 预先构建的价格字段取值函数，提取时不再逐根K线执行Python lambda
+_PRICE_GETTERS = {name: attrgetter(name) for name in ('open', 'high', 'low', 'close')}
+
+
+def price_array(klines: KlineSource, price_type: str = 'close') -> np.ndarray:
+    """
+    提取K线价格为连续的float64数组
+
+    Args:
+        klines: K线数据列表或KlineFrame（直接返回对应列，不复制）
+        price_type: 价格类型（'open', 'high', 'low', 'close'），未知类型按收盘价处理
+
+    Returns:
+        价格数组
+    """
+    if price_type not in _PRICE_GETTERS:
+        price_type = 'close'
+    if isinstance(klines, KlineFrame):
+        return klines.column(price_type)
+    get_price = _PRICE_GETTERS[price_type]
+    return np.fromiter(map(get_price, klines), dtype=np.float64, count=len(klines))
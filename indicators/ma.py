@@ -1,114 +1,242 @@
 """
 均线指标
 """
-from typing import List, Optional
+from collections import deque
+import math
+from typing import List, Tuple
 import numpy as np
 
-from database.models import KlineData
+from indicators.jit import njit, prange
+from indicators.kline_frame import KlineSource, price_array
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-def MA(prices: List[float], period: int) -> List[Optional[float]]:
+def MA(prices: np.ndarray, period: int) -> np.ndarray:
     """
     计算简单移动平均线（MA）
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         period: 周期
         
     Returns:
-        MA值列表
+        MA数组（float64），前period-1个值（数据不足时为全部）为NaN
     """
-    if len(prices) < period:
-        return [None] * len(prices)
-    
-    ma_values = []
-    for i in range(len(prices)):
-        if i < period - 1:
-            ma_values.append(None)
-        else:
-            ma = sum(prices[i - period + 1:i + 1]) / period
-            ma_values.append(ma)
-    
-    return ma_values
+    arr = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(arr), np.nan)
+    if len(arr) < period:
+        return out
 
+    # 用累积和一次性求出所有窗口的均值：sum(i-period+1..i) = cs[i+1] - cs[i+1-period]
+    cs = np.empty(len(arr) + 1)
+    cs[0] = 0.0
+    np.cumsum(arr, out=cs[1:])
+    out[period - 1:] = (cs[period:] - cs[:-period]) * (1.0 / period)
+    return out
 
-def SMA(prices: List[float], period: int) -> List[Optional[float]]:
+
+def SMA(prices: np.ndarray, period: int) -> np.ndarray:
     """
     计算简单移动平均线（SMA，与MA相同）
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         period: 周期
         
     Returns:
-        SMA值列表
+        SMA数组（float64），无效处为NaN
     """
     return MA(prices, period)
 
 
-def EMA(prices: List[float], period: int) -> List[Optional[float]]:
+def EMA(prices: np.ndarray, period: int) -> np.ndarray:
     """
     计算指数移动平均线（EMA）
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         period: 周期
         
     Returns:
-        EMA值列表
+        EMA数组（float64），前period-1个值（数据不足时为全部）为NaN
     """
-    if len(prices) < period:
-        return [None] * len(prices)
-    
+    arr = np.asarray(prices, dtype=np.float64)
+    if len(arr) < period:
+        return np.full(len(arr), np.nan)
+    return _ema_core(arr, period)
+
+
+@njit(cache=True)
+def _ema_core(x: np.ndarray, period: int) -> np.ndarray:
+    """EMA递推核心（numba可用时编译为本地代码），前period-1个值为NaN"""
+    out = np.empty_like(x)
+    out[:period - 1] = np.nan
+
+    # 第一个EMA值使用SMA
+    s = 0.0
+    for i in range(period):
+        s += x[i]
+    prev = s / period
+    out[period - 1] = prev
+
+    # 计算后续EMA值
     multiplier = 2.0 / (period + 1)
-    ema_values = []
+    for i in range(period, x.size):
+        prev = (x[i] - prev) * multiplier + prev
+        out[i] = prev
+
+    return out
+
+
+class MAState:
+    """
+    MA的增量计算状态
     
-    # 第一个EMA值使用SMA
-    first_ema = sum(prices[:period]) / period
-    ema_values.extend([None] * (period - 1))
-    ema_values.append(first_ema)
+    新价格到达时调用update()，O(1)得到最新的MA值，与MA()对同一序列计算的末值一致。
+    """
     
-    # 计算后续EMA值
-    for i in range(period, len(prices)):
-        ema = (prices[i] - ema_values[i - 1]) * multiplier + ema_values[i - 1]
-        ema_values.append(ema)
+    __slots__ = ('period', 'value', '_window', '_sum')
     
-    return ema_values
+    def __init__(self, period: int):
+        """
+        初始化
+        
+        Args:
+            period: 周期
+        """
+        self.period = period
+        self.value = math.nan  # 最新MA值，数据不足时为NaN
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+    
+    def update(self, price: float) -> float:
+        """
+        加入一个新价格
+        
+        Args:
+            price: 价格
+            
+        Returns:
+            最新MA值，数据不足时为NaN
+        """
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(price)
+        self._sum += price
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
 
 
-def calculate_ma_from_klines(klines: List[KlineData],
+class EMAState:
+    """
+    EMA的增量计算状态
+    
+    初值与EMA()相同（前period个价格的SMA），之后每个价格O(1)递推。
+    """
+    
+    __slots__ = ('period', 'k', 'value', 'count', '_sum')
+    
+    def __init__(self, period: int):
+        """
+        初始化
+        
+        Args:
+            period: 周期
+        """
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value = math.nan  # 最新EMA值，数据不足时为NaN
+        self.count = 0  # 已加入的价格数量
+        self._sum = 0.0
+    
+    def update(self, price: float) -> float:
+        """
+        加入一个新价格
+        
+        Args:
+            price: 价格
+            
+        Returns:
+            最新EMA值，数据不足时为NaN
+        """
+        self.count += 1
+        if self.count < self.period:
+            self._sum += price
+        elif self.count == self.period:
+            self.value = (self._sum + price) / self.period
+        else:
+            self.value = (price - self.value) * self.k + self.value
+        return self.value
+
+
+def ma_ema_arrays(prices: np.ndarray, periods: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    一次计算多个周期的MA和EMA
+    
+    各周期在numba可用时并行计算，每个周期只遍历一次价格。未安装numba时
+    逐周期的Python循环比MA的累积和写法慢，调用方应改用MA/EMA。
+    
+    Args:
+        prices: 价格数组
+        periods: 周期列表
+        
+    Returns:
+        (MA数组, EMA数组)，形状均为(len(periods), len(prices))，无效处为NaN
+    """
+    return _ma_ema_core(np.asarray(prices, dtype=np.float64), np.asarray(periods, dtype=np.int64))
+
+
+@njit(cache=True, parallel=True)
+def _ma_ema_core(x: np.ndarray, periods: np.ndarray):
+    """按周期并行递推滚动和与EMA"""
+    n = x.size
+    out_ma = np.full((periods.size, n), np.nan)
+    out_ema = np.full((periods.size, n), np.nan)
+    for j in prange(periods.size):
+        period = periods[j]
+        if period < 1 or period > n:
+            continue
+        
+        # 第一个窗口：MA与EMA的初值相同
+        s = 0.0
+        for i in range(period):
+            s += x[i]
+        prev = s / period
+        out_ma[j, period - 1] = prev
+        out_ema[j, period - 1] = prev
+        
+        multiplier = 2.0 / (period + 1)
+        for i in range(period, n):
+            s += x[i] - x[i - period]
+            out_ma[j, i] = s / period
+            prev = (x[i] - prev) * multiplier + prev
+            out_ema[j, i] = prev
+    return out_ma, out_ema
+
+
+def calculate_ma_from_klines(klines: KlineSource,
                             period: int,
                             price_type: str = 'close',
-                            ma_type: str = 'SMA') -> List[Optional[float]]:
+                            ma_type: str = 'SMA') -> np.ndarray:
     """
     从K线数据计算均线
     
     Args:
-        klines: K线数据列表
+        klines: K线数据列表或KlineFrame
         period: 周期
         price_type: 价格类型（'open', 'high', 'low', 'close'）
         ma_type: 均线类型（'SMA', 'EMA'）
         
     Returns:
-        均线值列表
+        均线数组（float64），无效处为NaN
     """
-    # 提取价格
-    price_map = {
-        'open': lambda k: k.open,
-        'high': lambda k: k.high,
-        'low': lambda k: k.low,
-        'close': lambda k: k.close,
-    }
-    
-    get_price = price_map.get(price_type, lambda k: k.close)
-    prices = [get_price(k) for k in klines]
+    prices = price_array(klines, price_type)
     
     # 计算均线
     if ma_type == 'EMA':
         return EMA(prices, period)
     else:
         return SMA(prices, period)
-
@@ -1,50 +1,132 @@
 """
 MACD指标
 """
-from typing import List, Optional, Tuple
-from indicators.ma import EMA
+import math
+from typing import Tuple
+import numpy as np
 
+from indicators.jit import njit
+from indicators.ma import EMAState
 
-def MACD(prices: List[float],
+
+def MACD(prices: np.ndarray,
          fast_period: int = 12,
          slow_period: int = 26,
-         signal_period: int = 9) -> Tuple[List[Optional[float]],
-                                          List[Optional[float]],
-                                          List[Optional[float]]]:
+         signal_period: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     计算MACD指标
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         fast_period: 快线周期（默认12）
         slow_period: 慢线周期（默认26）
         signal_period: 信号线周期（默认9）
         
     Returns:
-        (DIF, DEA, MACD) 元组
+        (DIF, DEA, MACD) float64数组元组，无效处为NaN
+    """
+    return _macd_core(np.asarray(prices, dtype=np.float64), fast_period, slow_period, signal_period)
+
+
+class MACDState:
+    """
+    MACD的增量计算状态
+    
+    组合快线、慢线和DEA三个EMAState，新价格到达时O(1)更新，
+    与MACD()对同一序列计算的末值一致（DIF无效时按0参与DEA计算）。
     """
-    # 计算快线和慢线EMA
-    fast_ema = EMA(prices, fast_period)
-    slow_ema = EMA(prices, slow_period)
-    
-    # 计算DIF（快线 - 慢线）
-    dif = []
-    for i in range(len(prices)):
-        if fast_ema[i] is None or slow_ema[i] is None:
-            dif.append(None)
-        else:
-            dif.append(fast_ema[i] - slow_ema[i])
     
-    # 计算DEA（DIF的EMA）
-    dea = EMA([d if d is not None else 0 for d in dif], signal_period)
+    __slots__ = ('fast', 'slow', 'signal', 'dif', 'dea', 'macd')
     
-    # 计算MACD柱（(DIF - DEA) * 2）
-    macd = []
-    for i in range(len(prices)):
-        if dif[i] is None or dea[i] is None:
-            macd.append(None)
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        """
+        初始化
+        
+        Args:
+            fast_period: 快线周期
+            slow_period: 慢线周期
+            signal_period: 信号线周期
+        """
+        self.fast = EMAState(fast_period)
+        self.slow = EMAState(slow_period)
+        self.signal = EMAState(signal_period)
+        # 最新的DIF、DEA、MACD柱，数据不足时为NaN
+        self.dif = math.nan
+        self.dea = math.nan
+        self.macd = math.nan
+    
+    def update(self, price: float) -> Tuple[float, float, float]:
+        """
+        加入一个新价格
+        
+        Args:
+            price: 价格
+            
+        Returns:
+            (DIF, DEA, MACD)，数据不足时为NaN
+        """
+        self.dif = self.fast.update(price) - self.slow.update(price)
+        self.dea = self.signal.update(0.0 if math.isnan(self.dif) else self.dif)
+        self.macd = (self.dif - self.dea) * 2
+        return self.dif, self.dea, self.macd
+
+
+@njit(cache=True)
+def _macd_core(x: np.ndarray, fast_period: int, slow_period: int, signal_period: int):
+    """
+    一次遍历同时递推快线、慢线和DEA（numba可用时编译为本地代码）
+    
+    与分别计算三条EMA的结果一致：每条EMA以前period个值的SMA为初值，
+    DIF无效处按0参与DEA计算。
+    """
+    n = x.size
+    dif = np.empty(n)
+    dea = np.empty(n)
+    macd = np.empty(n)
+    
+    k_fast = 2.0 / (fast_period + 1)
+    k_slow = 2.0 / (slow_period + 1)
+    k_signal = 2.0 / (signal_period + 1)
+    dif_start = max(fast_period, slow_period) - 1
+    
+    fast = 0.0
+    slow = 0.0
+    signal = 0.0
+    for i in range(n):
+        price = x[i]
+        
+        # 快线和慢线EMA（前period个值累加求SMA作为初值）
+        if i < fast_period:
+            fast += price
+            if i == fast_period - 1:
+                fast /= fast_period
+        else:
+            fast = (price - fast) * k_fast + fast
+        if i < slow_period:
+            slow += price
+            if i == slow_period - 1:
+                slow /= slow_period
         else:
-            macd.append((dif[i] - dea[i]) * 2)
+            slow = (price - slow) * k_slow + slow
+        
+        # DIF（快线 - 慢线）
+        if i >= dif_start:
+            d = fast - slow
+            dif[i] = d
+        else:
+            d = 0.0
+            dif[i] = np.nan
+        
+        # DEA（DIF的EMA）
+        if i < signal_period:
+            signal += d
+            if i == signal_period - 1:
+                signal /= signal_period
+        else:
+            signal = (d - signal) * k_signal + signal
+        dea[i] = signal if i >= signal_period - 1 else np.nan
+        
+        # MACD柱（(DIF - DEA) * 2）
+        macd[i] = (dif[i] - dea[i]) * 2
     
     return dif, dea, macd
-
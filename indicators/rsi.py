@@ -1,62 +1,116 @@
 """
 RSI指标
 """
-from typing import List, Optional
+import math
+from typing import Optional
+import numpy as np
 
+from indicators.jit import njit
 
-def RSI(prices: List[float], period: int = 14) -> List[Optional[float]]:
+
+def RSI(prices: np.ndarray, period: int = 14) -> np.ndarray:
     """
     计算RSI指标（相对强弱指标）
     
     Args:
-        prices: 价格列表
+        prices: 价格数组或列表
         period: 周期（默认14）
         
     Returns:
-        RSI值列表（0-100）
+        RSI数组（0-100，float64），前period个值（数据不足时为全部）为NaN
     """
-    if len(prices) < period + 1:
-        return [None] * len(prices)
+    arr = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(arr), np.nan)
+    if len(arr) < period + 1:
+        return out
     
-    rsi_values = [None] * period
+    # 计算价格变化，拆分为涨幅和跌幅
+    changes = np.diff(arr)
+    gains = np.clip(changes, 0.0, None)
+    losses = np.clip(-changes, 0.0, None)
     
-    # 计算价格变化
-    changes = []
-    for i in range(1, len(prices)):
-        changes.append(prices[i] - prices[i - 1])
+    # 第一个价格没有变化值，RSI从第period个价格开始
+    out[1:] = _wilder_rsi(gains, losses, period)
+    return out
+
+
+class RSIState:
+    """
+    RSI的增量计算状态
     
-    # 计算初始平均涨幅和平均跌幅
-    gains = [max(0, c) for c in changes[:period]]
-    losses = [max(0, -c) for c in changes[:period]]
+    维护Wilder平滑后的平均涨幅和平均跌幅，新价格到达时O(1)更新，
+    与RSI()对同一序列计算的末值一致。
+    """
     
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
+    __slots__ = ('period', 'value', 'count', 'avg_gain', 'avg_loss', '_prev')
     
-    # 计算第一个RSI值
-    if avg_loss == 0:
-        rsi = 100.0
-    else:
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-    rsi_values.append(rsi)
+    def __init__(self, period: int = 14):
+        """
+        初始化
+        
+        Args:
+            period: 周期
+        """
+        self.period = period
+        self.value = math.nan  # 最新RSI值，数据不足时为NaN
+        self.count = 0  # 已累计的价格变化数量
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._prev: Optional[float] = None
     
-    # 计算后续RSI值（使用平滑移动平均）
-    for i in range(period, len(changes)):
-        change = changes[i]
-        gain = max(0, change)
-        loss = max(0, -change)
+    def update(self, price: float) -> float:
+        """
+        加入一个新价格
         
-        # 平滑移动平均
-        avg_gain = (avg_gain * (period - 1) + gain) / period
-        avg_loss = (avg_loss * (period - 1) + loss) / period
+        Args:
+            price: 价格
+            
+        Returns:
+            最新RSI值（0-100），数据不足时为NaN
+        """
+        prev, self._prev = self._prev, price
+        if prev is None:
+            return self.value
         
-        if avg_loss == 0:
-            rsi = 100.0
+        change = price - prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.count += 1
+        period = self.period
+        if self.count <= period:
+            # 前period个变化先累加，满period个时求平均作为初值
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if self.count < period:
+                return self.value
+            self.avg_gain /= period
+            self.avg_loss /= period
         else:
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+            self.avg_gain = (self.avg_gain * (period - 1) + gain) / period
+            self.avg_loss = (self.avg_loss * (period - 1) + loss) / period
         
-        rsi_values.append(rsi)
-    
-    return rsi_values
+        if self.avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return self.value
 
+
+@njit(cache=True)
+def _wilder_rsi(gains: np.ndarray, losses: np.ndarray, period: int) -> np.ndarray:
+    """Wilder平滑计算RSI（numba可用时编译为本地代码），前period-1个值为NaN"""
+    out = np.empty(gains.size)
+    out[:period - 1] = np.nan
+    
+    # 计算初始平均涨幅和平均跌幅
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    out[period - 1] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    
+    # 计算后续RSI值（使用平滑移动平均）
+    for i in range(period, gains.size):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        out[i] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    
+    return out
@@ -1,153 +1,335 @@
 """
 技术指标库（统一接口）
 """
-from typing import List, Optional, Dict, Any
-from database.models import KlineData
+from collections import OrderedDict
+import hashlib
+from typing import List, Optional, Dict, Any, Tuple
+import math
+import time
+from threading import Lock
+import numpy as np
 
-from indicators.ma import MA, EMA, SMA, calculate_ma_from_klines
+from indicators.ma import MA, EMA, ma_ema_arrays
 from indicators.macd import MACD
 from indicators.rsi import RSI
 from indicators.bollinger import BollingerBands
+from indicators.kline_frame import KlineSource, price_array
+from indicators.jit import NUMBA_AVAILABLE
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 尝试导入TA-Lib（C实现，可用时优先使用）
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
+    logger.debug("TA-Lib未安装，技术指标使用内置实现计算")
+
+# calculate_all结果缓存 {指纹: (计算时间, 结果)}，界面按固定频率刷新而K线未变时直接复用
+_CACHE_TTL = 15.0
+_CACHE_MAXSIZE = 32
+_calculate_all_cache: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = Lock()
+
+
+def to_list_with_none(values: np.ndarray) -> List[Optional[float]]:
+    """
+    将指标数组转换为列表，前导NaN转换为None
+    
+    仅供仍按 List[Optional[float]] 处理指标结果的旧代码过渡使用，新代码应直接使用数组。
+    """
+    result = np.asarray(values, dtype=np.float64).tolist()
+    for i, v in enumerate(result):
+        if not math.isnan(v):
+            return [None] * i + result[i:]
+    return [None] * len(result)
+
+
+def _sma_array(prices: np.ndarray, period: int) -> np.ndarray:
+    """由价格数组计算SMA数组（无效处为NaN）"""
+    if TALIB_AVAILABLE:
+        return talib.SMA(prices, timeperiod=period)
+    return MA(prices, period)
+
+
+def _ema_array(prices: np.ndarray, period: int) -> np.ndarray:
+    """由价格数组计算EMA数组（无效处为NaN）"""
+    if TALIB_AVAILABLE:
+        return talib.EMA(prices, timeperiod=period)
+    return EMA(prices, period)
+
+
+def _cached_ema(prices: np.ndarray, period: int, emas: Dict[int, np.ndarray]) -> np.ndarray:
+    """从emas中取出已计算的EMA数组，没有时计算并存入"""
+    values = emas.get(period)
+    if values is None:
+        values = emas[period] = _ema_array(prices, period)
+    return values
+
+
+def _macd_arrays(prices: np.ndarray, fast_period: int, slow_period: int, signal_period: int,
+                 emas: Optional[Dict[int, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    由价格数组计算MACD数组
+    
+    口径与indicators.macd.MACD一致：DIF无效处按0参与DEA计算（因此不使用talib.MACD）。
+    
+    Args:
+        emas: 同一价格数组上已计算的EMA {周期: 数组}，快慢线命中时直接复用
+    """
+    if emas is None:
+        emas = {}
+    if not TALIB_AVAILABLE and (fast_period not in emas or slow_period not in emas):
+        # 快慢线没有现成结果时，三条EMA在一次遍历中同时递推
+        dif, dea, macd = MACD(prices, fast_period, slow_period, signal_period)
+    else:
+        dif = _cached_ema(prices, fast_period, emas) - _cached_ema(prices, slow_period, emas)
+        dea = _ema_array(np.nan_to_num(dif), signal_period)
+        macd = (dif - dea) * 2
+    return {
+        'dif': dif,
+        'dea': dea,
+        'macd': macd
+    }
+
+
+def _rsi_array(prices: np.ndarray, period: int) -> np.ndarray:
+    """由价格数组计算RSI数组（无效处为NaN）"""
+    if TALIB_AVAILABLE:
+        return talib.RSI(prices, timeperiod=period)
+    return RSI(prices, period)
+
+
+def _bollinger_arrays(prices: np.ndarray, period: int, num_std: float) -> Dict[str, np.ndarray]:
+    """由价格数组计算布林带数组"""
+    if TALIB_AVAILABLE and period > 1:
+        # talib.BBANDS使用总体标准差，内置实现使用样本标准差，换算倍数保持口径一致
+        nbdev = num_std * math.sqrt(period / (period - 1))
+        upper, middle, lower = talib.BBANDS(prices, timeperiod=period, nbdevup=nbdev, nbdevdn=nbdev)
+    else:
+        upper, middle, lower = BollingerBands(prices, period, num_std)
+    return {
+        'upper': upper,
+        'middle': middle,
+        'lower': lower
+    }
+
+
+def _to_arrow_table(closes: np.ndarray, values: Dict[str, Any]):
+    """
+    将收盘价和指标数组组装为pyarrow.Table（数值列零拷贝，无效值保留为NaN）
+    
+    嵌套的指标（MACD、布林带）按内层名称展开为列：dif/dea/macd、upper/middle/lower。
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        logger.error("pyarrow未安装，无法返回Arrow表")
+        return None
+    
+    columns = {'close': pa.array(closes)}
+    for name, arr in values.items():
+        if isinstance(arr, dict):
+            for sub_name, sub_arr in arr.items():
+                columns[sub_name] = pa.array(sub_arr)
+        else:
+            columns[name] = pa.array(arr)
+    return pa.table(columns)
+
+
+def _params_key(params: Optional[Dict]) -> Optional[tuple]:
+    """将参数字典转换为可哈希的键"""
+    return None if params is None else tuple(sorted(params.items()))
+
+
+def _closes_fingerprint(closes: np.ndarray) -> tuple:
+    """
+    收盘价数组指纹
+    
+    所有指标都只依赖收盘价，按内容计算摘要，任意一根K线的收盘价变化
+    （包括原地修改之前的K线）都会使指纹变化。
+    """
+    return (len(closes), hashlib.blake2b(closes.tobytes(), digest_size=16).digest())
+
 
 class TechnicalIndicators:
     """技术指标计算类"""
     
     @staticmethod
-    def ma(klines: List[KlineData], period: int, price_type: str = 'close') -> List[Optional[float]]:
+    def ma(klines: KlineSource, period: int, price_type: str = 'close') -> np.ndarray:
         """
         计算移动平均线
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             period: 周期
             price_type: 价格类型
             
         Returns:
-            MA值列表
+            MA数组（float64），无效处为NaN
         """
-        return calculate_ma_from_klines(klines, period, price_type, 'SMA')
+        return _sma_array(price_array(klines, price_type), period)
     
     @staticmethod
-    def ema(klines: List[KlineData], period: int, price_type: str = 'close') -> List[Optional[float]]:
+    def ema(klines: KlineSource, period: int, price_type: str = 'close') -> np.ndarray:
         """
         计算指数移动平均线
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             period: 周期
             price_type: 价格类型
             
         Returns:
-            EMA值列表
+            EMA数组（float64），无效处为NaN
         """
-        return calculate_ma_from_klines(klines, period, price_type, 'EMA')
+        return _ema_array(price_array(klines, price_type), period)
     
     @staticmethod
-    def macd(klines: List[KlineData],
+    def macd(klines: KlineSource,
             fast_period: int = 12,
             slow_period: int = 26,
-            signal_period: int = 9) -> Dict[str, List[Optional[float]]]:
+            signal_period: int = 9) -> Dict[str, np.ndarray]:
         """
         计算MACD指标
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             fast_period: 快线周期
             slow_period: 慢线周期
             signal_period: 信号线周期
             
         Returns:
-            {'dif': [...], 'dea': [...], 'macd': [...]}
+            {'dif': 数组, 'dea': 数组, 'macd': 数组}，无效处为NaN
         """
-        prices = [k.close for k in klines]
-        dif, dea, macd = MACD(prices, fast_period, slow_period, signal_period)
-        return {
-            'dif': dif,
-            'dea': dea,
-            'macd': macd
-        }
+        return _macd_arrays(price_array(klines), fast_period, slow_period, signal_period)
     
     @staticmethod
-    def rsi(klines: List[KlineData], period: int = 14) -> List[Optional[float]]:
+    def rsi(klines: KlineSource, period: int = 14) -> np.ndarray:
         """
         计算RSI指标
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             period: 周期
             
         Returns:
-            RSI值列表
+            RSI数组（float64），无效处为NaN
         """
-        prices = [k.close for k in klines]
-        return RSI(prices, period)
+        return _rsi_array(price_array(klines), period)
     
     @staticmethod
-    def bollinger(klines: List[KlineData],
+    def bollinger(klines: KlineSource,
                  period: int = 20,
-                 num_std: float = 2.0) -> Dict[str, List[Optional[float]]]:
+                 num_std: float = 2.0) -> Dict[str, np.ndarray]:
         """
         计算布林带指标
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             period: 周期
             num_std: 标准差倍数
             
         Returns:
-            {'upper': [...], 'middle': [...], 'lower': [...]}
+            {'upper': 数组, 'middle': 数组, 'lower': 数组}，无效处为NaN
         """
-        prices = [k.close for k in klines]
-        upper, middle, lower = BollingerBands(prices, period, num_std)
-        return {
-            'upper': upper,
-            'middle': middle,
-            'lower': lower
-        }
+        return _bollinger_arrays(price_array(klines), period, num_std)
     
     @staticmethod
-    def calculate_all(klines: List[KlineData],
+    def calculate_all(klines: KlineSource,
                      ma_periods: List[int] = [5, 10, 20, 60],
                      macd_params: Dict = None,
                      rsi_period: int = 14,
-                     bollinger_params: Dict = None) -> Dict[str, Any]:
+                     bollinger_params: Dict = None,
+                     use_cache: bool = True,
+                     return_arrow: bool = False) -> Any:
         """
         计算所有指标
         
         Args:
-            klines: K线数据列表
+            klines: K线数据列表或KlineFrame
             ma_periods: MA周期列表
             macd_params: MACD参数
             rsi_period: RSI周期
             bollinger_params: 布林带参数
+            use_cache: 是否使用结果缓存（收盘价和参数相同且未超过有效期时直接返回）
+            return_arrow: 为True时返回pyarrow.Table（close及各指标列，无效值为NaN），
+                pyarrow未安装时返回None
             
         Returns:
-            所有指标字典
+            所有指标字典（值为float64数组，无效处为NaN）或pyarrow.Table
+            （启用缓存时多次调用可能返回同一对象，调用方不应修改）
         """
-        result = {}
+        # 收盘价只提取一次，缓存指纹和所有指标共用同一个数组
+        closes = price_array(klines)
+        
+        if use_cache:
+            key = (_closes_fingerprint(closes), tuple(ma_periods), _params_key(macd_params),
+                   rsi_period, _params_key(bollinger_params), return_arrow)
+            now = time.monotonic()
+            with _cache_lock:
+                cached = _calculate_all_cache.get(key)
+                if cached is not None and now - cached[0] < _CACHE_TTL:
+                    _calculate_all_cache.move_to_end(key)
+                    return cached[1]
+        
+        result = TechnicalIndicators._calculate_all(closes, ma_periods, macd_params,
+                                                    rsi_period, bollinger_params, return_arrow)
+        
+        if use_cache:
+            with _cache_lock:
+                _calculate_all_cache[key] = (now, result)
+                _calculate_all_cache.move_to_end(key)
+                while len(_calculate_all_cache) > _CACHE_MAXSIZE:
+                    _calculate_all_cache.popitem(last=False)
+        return result
+    
+    @staticmethod
+    def clear_cache():
+        """清空calculate_all的结果缓存"""
+        with _cache_lock:
+            _calculate_all_cache.clear()
+    
+    @staticmethod
+    def _calculate_all(closes: np.ndarray,
+                       ma_periods: List[int],
+                       macd_params: Optional[Dict],
+                       rsi_period: int,
+                       bollinger_params: Optional[Dict],
+                       return_arrow: bool = False) -> Any:
+        """根据收盘价数组计算所有指标（不使用缓存）"""
+        values: Dict[str, Any] = {}
+        emas: Dict[int, np.ndarray] = {}  # 已计算的EMA，MACD的快慢线可直接复用
         
         # MA指标
-        for period in ma_periods:
-            result[f'ma{period}'] = TechnicalIndicators.ma(klines, period)
-            result[f'ema{period}'] = TechnicalIndicators.ema(klines, period)
+        if NUMBA_AVAILABLE and not TALIB_AVAILABLE and ma_periods:
+            # 所有周期的MA和EMA在一个并行kernel中计算
+            ma_values, ema_values = ma_ema_arrays(closes, ma_periods)
+            for j, period in enumerate(ma_periods):
+                emas[period] = ema_values[j]
+                values[f'ma{period}'] = ma_values[j]
+                values[f'ema{period}'] = ema_values[j]
+        else:
+            for period in ma_periods:
+                values[f'ma{period}'] = _sma_array(closes, period)
+                values[f'ema{period}'] = _cached_ema(closes, period, emas)
         
         # MACD指标
         if macd_params is None:
             macd_params = {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}
-        result['macd'] = TechnicalIndicators.macd(klines, **macd_params)
+        values['macd'] = _macd_arrays(closes, emas=emas, **macd_params)
         
         # RSI指标
-        result['rsi'] = TechnicalIndicators.rsi(klines, rsi_period)
+        values['rsi'] = _rsi_array(closes, rsi_period)
         
         # 布林带指标
         if bollinger_params is None:
             bollinger_params = {'period': 20, 'num_std': 2.0}
-        result['bollinger'] = TechnicalIndicators.bollinger(klines, **bollinger_params)
+        values['bollinger'] = _bollinger_arrays(closes, **bollinger_params)
         
-        return result
-
+        if return_arrow:
+            return _to_arrow_table(closes, values)
+        return values
@@ -128,6 +128,9 @@ def example_history():
     if klines:
         print(f"第一条: {klines[0]}")
         print(f"最后一条: {klines[-1]}")
+    
+    # 归还CTP连接
+    history.close()
 
 
 def example_sim_trading():
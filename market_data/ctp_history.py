@@ -1,15 +1,22 @@
 """
 CTP历史行情接口
 """
-from datetime import datetime, timedelta
-from typing import List, Optional, Callable
-import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from operator import attrgetter
+from threading import Event, Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Callable, Set
+import numpy as np
 from database.models import KlineData, TickData
 from database.db_manager import DatabaseManager
 from market_data.data_handler import DataHandler
 from config.settings import settings
 from utils.logger import get_logger
-from utils.helpers import parse_datetime, parse_symbol
+from utils.helpers import (
+    get_exchange_from_symbol, get_next_trading_time, get_trading_days, is_trading_time,
+    parse_datetime, parse_symbol
+)
 
 logger = get_logger(__name__)
 
@@ -34,10 +41,242 @@ except ImportError:
         Interval = None
         logger.warning("vnpy-ctp未安装，历史数据查询功能将不可用")
 
+# 等待CTP登录的最长时间（秒）
+_LOGIN_TIMEOUT = 10
+
+# 交易所字符串、K线周期字符串 -> vnpy枚举（导入时构建一次，vnpy未安装时为空）
+# vnpy 的 Interval 只有 MINUTE/HOUR/DAILY 等基本周期，5m/15m/30m 先按1分钟查询再聚合
+if VNPY_CTP_AVAILABLE:
+    _EXCHANGE_ENUMS = {
+        'SHFE': Exchange.SHFE,
+        'DCE': Exchange.DCE,
+        'CZCE': Exchange.CZCE,
+        'CFFEX': Exchange.CFFEX,
+        'INE': Exchange.INE,
+        'GFEX': Exchange.GFEX,
+    }
+    _INTERVAL_ENUMS = {
+        '1m': Interval.MINUTE,
+        '5m': Interval.MINUTE,
+        '15m': Interval.MINUTE,
+        '30m': Interval.MINUTE,
+        '1h': Interval.HOUR,
+        '1d': Interval.DAILY,
+    }
+else:
+    _EXCHANGE_ENUMS = {}
+    _INTERVAL_ENUMS = {}
+
+
+class _CtpConnection:
+    """一个已创建的CTP网关及其事件引擎"""
+    
+    def __init__(self, event_engine, gateway):
+        self.event_engine = event_engine
+        self.gateway = gateway
+        self.login_event = Event()  # 收到登录成功日志时置位
+        self.recent_logs = deque(maxlen=5)  # 最近的日志，登录超时时输出
+        self.users = 0  # 持有该连接的CTPHistoryData数量
+    
+    def on_log(self, event):
+        """日志事件回调：检测登录成功"""
+        if hasattr(event, 'data') and event.data:
+            msg = str(event.data.msg) if hasattr(event.data, 'msg') else str(event.data)
+            self.recent_logs.append(msg)
+            if '登录成功' in msg:
+                self.login_event.set()
+
+
+class _CtpConnectionPool:
+    """
+    历史行情查询共用的CTP连接（按环境类型各保留一个）
+    
+    同一进程内的CTPHistoryData共用连接，只在第一次查询时创建事件引擎和网关并登录，
+    最后一个使用者调用release()后才断开。登录超时的连接在release()时移出连接池，
+    之后的acquire()会重新创建网关。
+    """
+    
+    _instance: Optional["_CtpConnectionPool"] = None
+    _instance_lock = Lock()
+    
+    def __init__(self):
+        self._lock = Lock()
+        self._connections: Dict[str, _CtpConnection] = {}
+    
+    @classmethod
+    def instance(cls) -> "_CtpConnectionPool":
+        """获取进程内唯一的连接池"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    def acquire(self, environment: str) -> Optional[_CtpConnection]:
+        """
+        获取CTP连接，没有连接时创建并发起登录（不等待登录完成）
+        
+        Args:
+            environment: 环境类型
+        
+        Returns:
+            CTP连接，创建失败时返回None
+        """
+        with self._lock:
+            conn = self._connections.get(environment)
+            if conn is None:
+                conn = self._create(environment)
+                if conn is None:
+                    return None
+                self._connections[environment] = conn
+            conn.users += 1
+            return conn
+    
+    def release(self, environment: str, conn: _CtpConnection, discard: bool = False):
+        """
+        归还连接，没有使用者时断开
+        
+        Args:
+            environment: 环境类型
+            conn: acquire()返回的连接
+            discard: 连接不可用（如登录超时）时为True，立即移出连接池，不再分配给新的使用者
+        """
+        with self._lock:
+            if (discard or conn.users <= 1) and self._connections.get(environment) is conn:
+                del self._connections[environment]
+            conn.users -= 1
+            if conn.users > 0:
+                return
+        
+        try:
+            conn.gateway.close()
+            conn.event_engine.stop()
+        except Exception as e:
+            logger.error(f"断开CTP连接失败: {e}")
+    
+    @staticmethod
+    def _create(environment: str) -> Optional[_CtpConnection]:
+        """创建事件引擎和CTP网关并发起连接"""
+        try:
+            # 创建事件引擎
+            event_engine = EventEngine()
+            event_engine.start()
+            
+            # 创建CTP网关
+            gateway = CtpGateway(event_engine, "CTP")
+            conn = _CtpConnection(event_engine, gateway)
+            
+            # 注册日志事件来检测连接状态（每个连接只注册一次）
+            from vnpy.trader.event import EVENT_LOG
+            event_engine.register(EVENT_LOG, conn.on_log)
+            
+            # 根据环境类型获取服务器地址
+            addresses = settings.get_server_addresses(environment)
+            
+            env_name = "7x24环境" if settings.is_7x24_environment(environment) else "CTP主席系统"
+            logger.info(f"正在连接CTP服务器（{env_name}）: {addresses['md_address']}")
+            
+            # 配置CTP连接参数
+            ctp_setting = {
+                "用户名": settings.CTP_USER_ID,
+                "密码": settings.CTP_PASSWORD,
+                "经纪商代码": settings.CTP_BROKER_ID,
+                "交易服务器": addresses['trade_address'],
+                "行情服务器": addresses['md_address'],
+                "产品名称": settings.CTP_APP_ID,
+                "授权编码": settings.CTP_AUTH_CODE,
+            }
+            
+            # 连接
+            gateway.connect(ctp_setting)
+            return conn
+            
+        except Exception as e:
+            logger.error(f"连接CTP失败: {e}")
+            return None
+
+
+# K线按列提取时各字段的数组类型
+_SOA_DTYPES = {
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64,
+    'open_interest': np.int64,
+    'turnover': np.float64,
+}
+_SOA_GETTERS = {name: attrgetter(name) for name in _SOA_DTYPES}
+_DATETIME_GETTER = attrgetter('datetime')
+
+
+def _wall_minute(dt: datetime) -> int:
+    """墙上时间的分钟序号（忽略时区，只看日期和时分）"""
+    return dt.toordinal() * 1440 + dt.hour * 60 + dt.minute
+
+
+def _next_bar_start(dt: datetime, interval: str) -> datetime:
+    """
+    K线dt所在周期之后的下一个周期的开始时间
+    
+    分钟周期按_aggregate_klines的时钟对齐方式计算，1h取下一个整点，1d取次日零点，
+    其他周期取dt之后1秒。
+    """
+    if interval.endswith('m') and interval[:-1].isdigit():
+        minutes = max(int(interval[:-1]), 1)
+        return dt.replace(second=0, microsecond=0) + timedelta(minutes=minutes - _wall_minute(dt) % minutes)
+    if interval == '1h':
+        return dt.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if interval == '1d':
+        return datetime.combine(dt.date() + timedelta(days=1), dt_time())
+    return dt + timedelta(seconds=1)
+
+
+# 日盘的开始和结束时间（按交易日检查数据是否缺失时使用）
+_DAY_SESSION_START = dt_time(9, 0)
+_DAY_SESSION_END = dt_time(15, 0)
+# 把 [start, min_dt) 这样的右开区间转换为闭区间时使用
+_EPSILON = timedelta(microseconds=1)
+
+
+def _expected_trading_dates(start: datetime, end: datetime) -> Set[date]:
+    """
+    日盘（09:00～15:00）与 [start, end] 有交集的交易日
+    
+    交易日只排除周末，节假日也会算在内；节假日没有K线时调用方改为从CTP查询，
+    不会把缺少整天数据的库当作完整数据。
+    """
+    first = datetime.combine(start.date(), _DAY_SESSION_START)
+    return {
+        day.date() for day in get_trading_days(first, end)
+        if datetime.combine(day.date(), _DAY_SESSION_START) <= end
+        and datetime.combine(day.date(), _DAY_SESSION_END) > start
+    }
+
+
+def _to_soa(klines: List[KlineData], fields: Iterable[str] = tuple(_SOA_DTYPES)) -> Dict[str, np.ndarray]:
+    """
+    将K线对象列表按列提取为NumPy数组
+    
+    Args:
+        klines: K线数据列表
+        fields: 需要提取的字段（ORM属性读取开销较大，只提取用到的列）
+    
+    Returns:
+        {字段名: 数组}
+    """
+    n = len(klines)
+    return {name: np.fromiter(map(_SOA_GETTERS[name], klines), dtype=_SOA_DTYPES[name], count=n)
+            for name in fields}
+
 
 class CTPHistoryData:
     """CTP历史行情数据接口"""
     
+    # 一次读取vnpy BarData的全部字段（BarData总是包含这些属性）
+    _BAR_FIELDS = attrgetter('symbol', 'datetime', 'open_price', 'high_price', 'low_price',
+                             'close_price', 'volume', 'open_interest', 'turnover')
+    
     def __init__(self, db_manager: Optional[DatabaseManager] = None,
                  environment: Optional[str] = None):
         """
@@ -51,7 +290,8 @@ class CTPHistoryData:
         self.data_handler = DataHandler()
         self.environment = environment or settings.CTP_ENVIRONMENT
         self._ctp_gateway: Optional[CtpGateway] = None
-        self._event_engine: Optional[EventEngine] = None
+        self._connection: Optional[_CtpConnection] = None  # 从_CtpConnectionPool获取的共享连接
+        self._connection_lock = Lock()  # download_many的多个线程同时连接时只获取一次连接
         self._connected = False
         
         env_name = "7x24环境" if settings.is_7x24_environment(self.environment) else "CTP主席系统"
@@ -80,9 +320,13 @@ class CTPHistoryData:
             logger.error(f"日期格式错误: {start_date}, {end_date}")
             return []
         
+        # 先取库中已有数据的时间范围，据此跳过不必要的查询
+        min_dt, max_dt, _ = self.db_manager.get_range_meta(symbol, interval)
+        in_db = max_dt is not None and start_dt <= max_dt and end_dt >= min_dt
+        
         # 如果从数据库获取
         if from_db:
-            klines = self.db_manager.get_klines(symbol, interval, start_dt, end_dt)
+            klines = self.db_manager.get_klines(symbol, interval, start_dt, end_dt) if in_db else []
             if klines:
                 logger.info(f"从数据库获取K线数据: {symbol}, {len(klines)}条")
                 return klines
@@ -91,11 +335,25 @@ class CTPHistoryData:
                 logger.info("提示：如需从CTP查询，请使用 from_db=False（注意：CTP API 通常不支持直接查询历史数据）")
                 return []
         
+        # 库中数据从开始时间起连续（没有缺少整个交易日）时，只需从CTP查询库中最后一根K线之后的部分
+        cached: List[KlineData] = []
+        query_start = start_dt
+        if (in_db and (min_dt <= start_dt or not _expected_trading_dates(start_dt, min_dt - _EPSILON))
+                and self._db_covers(symbol, interval, start_dt, min(max_dt, end_dt))):
+            query_start = _next_bar_start(max_dt, interval)
+            # 之后已没有需要的交易日，不必再查询CTP
+            if max_dt >= end_dt or not _expected_trading_dates(query_start, end_dt):
+                klines = self.db_manager.get_klines(symbol, interval, start_dt, end_dt)
+                logger.info(f"数据库已包含所需时间段，直接返回: {symbol}, {len(klines)}条")
+                return klines
+            cached = self.db_manager.get_klines(symbol, interval, start_dt, max_dt)
+            logger.info(f"数据库已包含 {start_dt} ~ {max_dt} 的{len(cached)}条K线，只查询之后的部分")
+        
         # 从CTP查询（需要实现CTP接口调用）
         # 注意：CTP API 通常不支持直接查询历史数据，此方法可能返回空
-        logger.info(f"从CTP查询K线数据: {symbol}, {interval}, {start_date} ~ {end_date}")
+        logger.info(f"从CTP查询K线数据: {symbol}, {interval}, {query_start} ~ {end_date}")
         logger.warning("提示：CTP API 通常不支持直接查询历史数据，建议使用 from_db=True 从数据库获取")
-        klines = self._query_kline_from_ctp(symbol, interval, start_dt, end_dt)
+        klines = self._query_kline_from_ctp(symbol, interval, query_start, end_dt)
         
         # 保存到数据库
         if klines:
@@ -104,7 +362,14 @@ class CTPHistoryData:
         else:
             logger.info("未从CTP查询到数据，建议使用实时行情接口积累数据到数据库")
         
-        return klines
+        return cached + klines
+    
+    def _db_covers(self, symbol: str, interval: str, start_dt: datetime, end_dt: datetime) -> bool:
+        """[start_dt, end_dt] 内的每个交易日在库中是否都有K线（不检查交易日内部的缺口）"""
+        expected = _expected_trading_dates(start_dt, end_dt)
+        if not expected:
+            return True
+        return expected <= self.db_manager.get_kline_dates(symbol, interval, start_dt, end_dt)
     
     def _connect_ctp(self) -> bool:
         """
@@ -121,7 +386,6 @@ class CTPHistoryData:
             return False
         
         # 检查交易时间（仅CTP主席系统需要检查，7x24环境全天候开放）
-        from utils.helpers import is_trading_time, get_next_trading_time
         is_7x24 = settings.is_7x24_environment(self.environment)
         if not is_7x24 and not is_trading_time():
             next_time = get_next_trading_time()
@@ -130,84 +394,46 @@ class CTPHistoryData:
             logger.info("提示：如需在非交易时间查询，请使用7x24环境")
             return False
         
-        try:
-            # 创建事件引擎
-            self._event_engine = EventEngine()
-            self._event_engine.start()
-            
-            # 创建CTP网关
-            self._ctp_gateway = CtpGateway(self._event_engine, "CTP")
-            
-            # 根据环境类型获取服务器地址
-            addresses = settings.get_server_addresses(self.environment)
-            
-            env_name = "7x24环境" if is_7x24 else "CTP主席系统"
-            logger.info(f"正在连接CTP服务器（{env_name}）: {addresses['md_address']}")
-            
-            # 配置CTP连接参数
-            ctp_setting = {
-                "用户名": settings.CTP_USER_ID,
-                "密码": settings.CTP_PASSWORD,
-                "经纪商代码": settings.CTP_BROKER_ID,
-                "交易服务器": addresses['trade_address'],
-                "行情服务器": addresses['md_address'],
-                "产品名称": settings.CTP_APP_ID,
-                "授权编码": settings.CTP_AUTH_CODE,
-            }
-            
-            # 连接
-            self._ctp_gateway.connect(ctp_setting)
-            
-            # 等待连接完成（最多等待10秒）
-            import time
-            timeout = 10
-            start_time = time.time()
-            
-            # 注册日志事件来检测连接状态
-            from vnpy.trader.event import EVENT_LOG
-            connection_events = []
-            
-            def on_log(event):
-                if hasattr(event, 'data') and event.data:
-                    msg = str(event.data.msg) if hasattr(event.data, 'msg') else str(event.data)
-                    connection_events.append(msg)
-                    if '登录成功' in msg or '行情服务器登录成功' in msg or '交易服务器登录成功' in msg:
-                        self._connected = True
-            
-            self._event_engine.register(EVENT_LOG, on_log)
-            
-            while not self._connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
+        # 从共享连接池获取连接（进程内第一次查询时创建并登录，之后直接复用）
+        with self._connection_lock:
+            if self._connection is None:
+                self._connection = _CtpConnectionPool.instance().acquire(self.environment)
+                if self._connection is None:
+                    return False
+                self._ctp_gateway = self._connection.gateway
+            conn = self._connection
+        
+        # 等待登录完成（最多等待_LOGIN_TIMEOUT秒，登录成功后立即返回）
+        if not conn.login_event.wait(timeout=_LOGIN_TIMEOUT):
             # 如果超时，检查是否有连接相关的日志
-            if not self._connected and connection_events:
-                logger.debug(f"连接日志: {connection_events[-5:]}")  # 显示最后5条日志
-            
-            if self._connected:
-                logger.info("CTP连接成功，可以查询历史数据")
-            else:
-                logger.warning("CTP连接超时，历史数据查询可能失败")
-            
-            return self._connected
-            
-        except Exception as e:
-            logger.error(f"连接CTP失败: {e}")
+            if conn.recent_logs:
+                logger.debug(f"连接日志: {list(conn.recent_logs)}")  # 显示最后5条日志
+            logger.warning("CTP连接超时，历史数据查询可能失败")
+            # 放弃这个连接，下次查询时重新创建网关
+            with self._connection_lock:
+                if self._connection is conn:
+                    _CtpConnectionPool.instance().release(self.environment, conn, discard=True)
+                    self._connection = None
+                    self._ctp_gateway = None
             return False
+        
+        self._connected = True
+        logger.info("CTP连接成功，可以查询历史数据")
+        return True
+    
+    def close(self):
+        """归还共享的CTP连接（没有其他使用者时断开）"""
+        with self._connection_lock:
+            if self._connection is None:
+                return
+            _CtpConnectionPool.instance().release(self.environment, self._connection)
+            self._connection = None
+            self._ctp_gateway = None
+            self._connected = False
     
     def _get_exchange_enum(self, exchange_str: str):
-        """将交易所字符串转换为Exchange枚举"""
-        if not VNPY_CTP_AVAILABLE or not Exchange:
-            return None
-        
-        exchange_map = {
-            'SHFE': Exchange.SHFE,
-            'DCE': Exchange.DCE,
-            'CZCE': Exchange.CZCE,
-            'CFFEX': Exchange.CFFEX,
-            'INE': Exchange.INE,
-            'GFEX': Exchange.GFEX,
-        }
-        return exchange_map.get(exchange_str)
+        """将交易所字符串转换为Exchange枚举（未知交易所或vnpy未安装时为None）"""
+        return _EXCHANGE_ENUMS.get(exchange_str)
     
     def _get_interval_enum(self, interval_str: str):
         """
@@ -221,20 +447,9 @@ class CTPHistoryData:
         - TICK (Tick数据)
         
         对于 5m, 15m, 30m 等周期，vnpy-ctp 可能不支持直接查询，
-        需要从 1分钟数据聚合生成。
+        需要从 1分钟数据聚合生成，这里映射为 MINUTE。
         """
-        if not VNPY_CTP_AVAILABLE or not Interval:
-            return None
-        
-        interval_map = {
-            '1m': Interval.MINUTE,
-            '5m': Interval.MINUTE,  # vnpy 不支持 5m，使用 1m 然后聚合
-            '15m': Interval.MINUTE,  # vnpy 不支持 15m，使用 1m 然后聚合
-            '30m': Interval.MINUTE,  # vnpy 不支持 30m，使用 1m 然后聚合
-            '1h': Interval.HOUR,
-            '1d': Interval.DAILY,
-        }
-        return interval_map.get(interval_str)
+        return _INTERVAL_ENUMS.get(interval_str)
     
     def _query_kline_from_ctp(self, symbol: str, interval: str,
                              start_dt: datetime, end_dt: datetime) -> List[KlineData]:
@@ -295,13 +510,8 @@ class CTPHistoryData:
             # 查询历史数据
             logger.info(f"正在查询历史K线数据: {symbol}, {query_interval}, {start_dt} ~ {end_dt}")
             
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H","location":"ctp_history.py:_query_kline_from_ctp","message":"Calling query_history","data":{"symbol":symbol,"exchange":str(exchange_enum),"interval":str(interval_enum),"start":start_dt.isoformat(),"end":end_dt.isoformat()},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            logger.debug("query_history call symbol=%s exchange=%s interval=%s start=%s end=%s",
+                         symbol, exchange_enum, interval_enum, start_dt, end_dt)
             
             # 注意：vnpy-ctp 的 query_history 方法可能未实现或返回空
             # CTP API 本身不直接支持历史数据查询
@@ -317,12 +527,8 @@ class CTPHistoryData:
                 logger.info("提示：CTP API 通常不支持直接查询历史数据，建议使用 from_db=True 从数据库获取")
                 bar_data_list = None
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"H","location":"ctp_history.py:_query_kline_from_ctp","message":"query_history returned","data":{"result_type":type(bar_data_list).__name__ if bar_data_list else "None","result_length":len(bar_data_list) if bar_data_list else 0,"result_is_none":bar_data_list is None},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            logger.debug("query_history returned %s bars",
+                         len(bar_data_list) if bar_data_list is not None else None)
             
             if not bar_data_list:
                 logger.warning("未查询到历史数据")
@@ -330,12 +536,6 @@ class CTPHistoryData:
                 logger.info("1. CTP API 通常不支持直接查询历史数据")
                 logger.info("2. 建议使用 from_db=True 从数据库获取历史数据")
                 logger.info("3. 或者使用实时行情接口积累数据到数据库")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"I","location":"ctp_history.py:_query_kline_from_ctp","message":"No data returned from query_history","data":{"symbol":symbol,"start":start_dt.isoformat(),"end":end_dt.isoformat(),"note":"CTP API may not support direct history query"},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return []
             
             # 转换vnpy BarData为KlineData
@@ -360,19 +560,7 @@ class CTPHistoryData:
     
     def _get_exchange_from_symbol(self, symbol: str) -> str:
         """从合约代码获取交易所代码（字符串）"""
-        # 根据合约代码前缀判断交易所
-        if symbol.startswith('rb') or symbol.startswith('cu') or symbol.startswith('au') or symbol.startswith('ag'):
-            return 'SHFE'  # 上海期货交易所
-        elif symbol.startswith('i') or symbol.startswith('j') or symbol.startswith('jm') or symbol.startswith('c'):
-            return 'DCE'  # 大连商品交易所
-        elif symbol.startswith('CF') or symbol.startswith('SR') or symbol.startswith('MA') or symbol.startswith('ZC'):
-            return 'CZCE'  # 郑州商品交易所
-        elif symbol.startswith('IF') or symbol.startswith('IC') or symbol.startswith('IH') or symbol.startswith('IM'):
-            return 'CFFEX'  # 中国金融期货交易所
-        elif symbol.startswith('sc') or symbol.startswith('lu') or symbol.startswith('bc'):
-            return 'INE'  # 上海国际能源交易中心
-        else:
-            return 'SHFE'  # 默认
+        return get_exchange_from_symbol(symbol)
     
     def _aggregate_klines(self, klines: List[KlineData], target_interval: str) -> List[KlineData]:
         """
@@ -398,80 +586,33 @@ class CTPHistoryData:
         if minutes <= 1:
             return klines
         
-        aggregated = []
-        current_group = []
-        
-        for kline in klines:
-            if not current_group:
-                # 开始新的一组
-                current_group = [kline]
-            else:
-                # 计算时间差（分钟）
-                time_diff = (kline.datetime - current_group[0].datetime).total_seconds() / 60
-                
-                if time_diff < minutes:
-                    # 仍在同一组内
-                    current_group.append(kline)
-                else:
-                    # 完成当前组，开始新组
-                    if current_group:
-                        aggregated_kline = self._merge_klines(current_group, target_interval)
-                        if aggregated_kline:
-                            aggregated.append(aggregated_kline)
-                    current_group = [kline]
-        
-        # 处理最后一组
-        if current_group:
-            aggregated_kline = self._merge_klines(current_group, target_interval)
-            if aggregated_kline:
-                aggregated.append(aggregated_kline)
-        
-        return aggregated
-    
-    def _merge_klines(self, klines: List[KlineData], interval: str) -> Optional[KlineData]:
-        """
-        合并一组K线数据为一条K线
-        
-        Args:
-            klines: 同一周期内的K线数据列表
-            interval: 目标周期
-        
-        Returns:
-            合并后的K线数据
-        """
-        if not klines:
-            return None
-        
-        # 使用第一条的开盘价，最后一条的收盘价
-        open_price = klines[0].open
-        close_price = klines[-1].close
-        
-        # 最高价和最低价
-        high_price = max(k.high for k in klines)
-        low_price = min(k.low for k in klines)
-        
-        # 成交量和成交额求和
-        volume = sum(k.volume for k in klines)
-        turnover = sum(k.turnover for k in klines)
-        
-        # 持仓量使用最后一条
-        open_interest = klines[-1].open_interest if klines else 0
-        
-        # 使用第一条的时间作为K线时间
-        dt = klines[0].datetime
-        
-        return self.data_handler.create_kline(
-            symbol=klines[0].symbol,
-            dt=dt,
-            interval=interval,
-            open_price=open_price,
-            high_price=high_price,
-            low_price=low_price,
-            close_price=close_price,
-            volume=volume,
-            open_interest=open_interest,
-            turnover=turnover
-        )
+        # 按本地时钟对齐划分周期（如5m为9:00、9:05……），周期号为墙上时间的分钟序号整除周期分钟数；
+        # 中间有缺口（午休、夜盘间隔等）时后面的K线仍落在各自的时钟周期内
+        n = len(klines)
+        wall_minutes = np.fromiter(map(_wall_minute, map(_DATETIME_GETTER, klines)), dtype=np.int64, count=n)
+        bucket = wall_minutes // minutes
+        
+        # 每组第一根K线的下标，以及每组最后一根K线的下标
+        edges = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+        lasts = np.r_[edges[1:] - 1, n - 1]
+        
+        # 最高/最低价、成交量和成交额按组归约
+        soa = _to_soa(klines, ('high', 'low', 'volume', 'turnover'))
+        highs = np.maximum.reduceat(soa['high'], edges).tolist()
+        lows = np.minimum.reduceat(soa['low'], edges).tolist()
+        volumes = np.add.reduceat(soa['volume'], edges).tolist()
+        turnovers = np.add.reduceat(soa['turnover'], edges).tolist()
+        
+        # 只为聚合后的K线创建对象，使用每组第一根的时间作为K线时间
+        # 开盘价取每组第一根，收盘价和持仓量取每组最后一根；
+        # 同一列表内合约和交易所相同，直接沿用第一根K线的，不再逐根解析合约代码
+        symbol, exchange = klines[0].symbol, klines[0].exchange
+        return [
+            KlineData(symbol, exchange, klines[first].datetime, target_interval,
+                      klines[first].open, highs[g], lows[g], klines[last].close,
+                      volumes[g], klines[last].open_interest, turnovers[g])
+            for g, (first, last) in enumerate(zip(edges.tolist(), lasts.tolist()))
+        ]
     
     def _convert_vnpy_bar_data(self, bar_data, interval: str) -> Optional[KlineData]:
         """
@@ -485,24 +626,22 @@ class CTPHistoryData:
             KlineData对象
         """
         try:
-            symbol = bar_data.symbol.split('.')[0] if '.' in bar_data.symbol else bar_data.symbol
-            dt = bar_data.datetime if hasattr(bar_data, 'datetime') else datetime.now()
+            symbol, dt, open_price, high_price, low_price, close_price, volume, open_interest, turnover = \
+                self._BAR_FIELDS(bar_data)
             
-            kline = self.data_handler.create_kline(
-                symbol=symbol,
+            return self.data_handler.create_kline(
+                symbol=symbol.split('.', 1)[0],
                 dt=dt,
                 interval=interval,
-                open_price=float(bar_data.open_price) if hasattr(bar_data, 'open_price') else 0.0,
-                high_price=float(bar_data.high_price) if hasattr(bar_data, 'high_price') else 0.0,
-                low_price=float(bar_data.low_price) if hasattr(bar_data, 'low_price') else 0.0,
-                close_price=float(bar_data.close_price) if hasattr(bar_data, 'close_price') else 0.0,
-                volume=int(bar_data.volume) if hasattr(bar_data, 'volume') else 0,
-                open_interest=int(bar_data.open_interest) if hasattr(bar_data, 'open_interest') else 0,
-                turnover=float(bar_data.turnover) if hasattr(bar_data, 'turnover') else 0.0
+                open_price=float(open_price),
+                high_price=float(high_price),
+                low_price=float(low_price),
+                close_price=float(close_price),
+                volume=int(volume),
+                open_interest=int(open_interest),
+                turnover=float(turnover)
             )
             
-            return kline
-            
         except Exception as e:
             logger.error(f"转换Bar数据失败: {e}")
             return None
@@ -546,6 +685,50 @@ class CTPHistoryData:
         
         return ticks
     
+    def iter_kline(self, symbol: str, interval: str,
+                   start_date: str, end_date: str) -> Iterator[KlineData]:
+        """
+        从数据库按时间顺序逐条读取历史K线（流式，适合大范围数据）
+        
+        Args:
+            symbol: 合约代码
+            interval: K线周期
+            start_date: 开始日期
+            end_date: 结束日期
+        
+        Returns:
+            K线数据迭代器，需要列表时由调用方list(...)
+        """
+        start_dt = parse_datetime(start_date)
+        end_dt = parse_datetime(end_date)
+        
+        if not start_dt or not end_dt:
+            logger.error(f"日期格式错误: {start_date}, {end_date}")
+            return iter(())
+        
+        return self.db_manager.iter_klines(symbol, interval, start_dt, end_dt)
+    
+    def iter_tick(self, symbol: str, start_date: str, end_date: str) -> Iterator[TickData]:
+        """
+        从数据库按时间顺序逐条读取历史Tick（流式，适合大范围数据）
+        
+        Args:
+            symbol: 合约代码
+            start_date: 开始日期
+            end_date: 结束日期
+        
+        Returns:
+            Tick数据迭代器，需要列表时由调用方list(...)
+        """
+        start_dt = parse_datetime(start_date)
+        end_dt = parse_datetime(end_date)
+        
+        if not start_dt or not end_dt:
+            logger.error(f"日期格式错误: {start_date}, {end_date}")
+            return iter(())
+        
+        return self.db_manager.iter_ticks(symbol, start_dt, end_dt)
+    
     def _query_tick_from_ctp(self, symbol: str,
                              start_dt: datetime, end_dt: datetime) -> List[TickData]:
         """
@@ -564,7 +747,7 @@ class CTPHistoryData:
         return []
     
     def download_and_save(self, symbol: str, interval: str,
-                         start_date: str, end_date: str):
+                         start_date: str, end_date: str) -> int:
         """
         下载并保存历史数据到数据库
         
@@ -573,10 +756,44 @@ class CTPHistoryData:
             interval: K线周期
             start_date: 开始日期
             end_date: 结束日期
+        
+        Returns:
+            下载的K线数量
         """
         logger.info(f"开始下载历史数据: {symbol}, {interval}, {start_date} ~ {end_date}")
         klines = self.get_kline(symbol, interval, start_date, end_date, from_db=False)
         logger.info(f"历史数据下载完成: {len(klines)}条")
+        return len(klines)
+    
+    def download_many(self, symbols: List[str], interval: str,
+                      start_date: str, end_date: str,
+                      max_workers: int = 8) -> Dict[str, int]:
+        """
+        并行下载多个合约的历史数据并保存到数据库
+        
+        CTP查询和数据库写入都以等待IO为主，各合约在线程池中同时下载，
+        共用同一个CTP连接和数据库连接池。
+        
+        Args:
+            symbols: 合约代码列表
+            interval: K线周期
+            start_date: 开始日期
+            end_date: 结束日期
+            max_workers: 最大并行线程数
+        
+        Returns:
+            {合约代码: 下载的K线数量}，下载失败的合约为0
+        """
+        def download(symbol: str) -> int:
+            try:
+                return self.download_and_save(symbol, interval, start_date, end_date)
+            except Exception as e:
+                logger.error(f"下载历史数据失败: {symbol}, {e}", exc_info=True)
+                return 0
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="history-download") as executor:
+            counts = list(executor.map(download, symbols))
+        return dict(zip(symbols, counts))
     
     def get_latest_kline(self, symbol: str, interval: str) -> Optional[KlineData]:
         """
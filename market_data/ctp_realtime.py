@@ -1,9 +1,11 @@
 """
 CTP实时行情接口 - SimNow 模拟环境
 """
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Callable, Optional
-from threading import Event
+from operator import attrgetter
+from typing import Deque, Dict, List, Callable, Optional, Tuple
+from threading import Event, Thread
 import time
 
 from database.models import KlineData, TickData
@@ -11,7 +13,7 @@ from database.db_manager import DatabaseManager
 from market_data.data_handler import DataHandler
 from config.settings import settings
 from utils.logger import get_logger
-from utils.helpers import parse_symbol, is_trading_time, get_next_trading_time
+from utils.helpers import parse_symbol, is_trading_time, get_next_trading_time, get_exchange_from_symbol
 
 logger = get_logger(__name__)
 
@@ -44,10 +46,48 @@ except ImportError:
         Exchange = None
         logger.error("vnpy-ctp未安装或依赖缺失，请运行: pip install vnpy vnpy-ctp")
 
+# 自动保存时缓冲的Tick/K线达到该数量立即唤醒写库线程
+_FLUSH_SIZE = 500
+# 后台线程定时把缓冲写库的间隔（秒）
+_FLUSH_INTERVAL = 1.0
+# 写库缓冲的容量，数据库长时间不可用时丢弃最早的数据，避免内存无限增长
+_BUFFER_MAXLEN = 65536
+
+# 日志中表示连接成功/失败的关键字（与小写化后的日志比较）
+_CONNECT_SUCCESS_KEYWORDS = ('连接成功', '登录成功', 'connected', 'login success')
+_CONNECT_FAILURE_KEYWORDS = ('连接失败', '登录失败', 'failed', 'error', 'timeout')
+
+
+def _drain(buffer: Deque) -> list:
+    """
+    取出缓冲中当前的全部元素
+    
+    deque的append/popleft本身是原子的，行情线程可以在取出的同时继续放入，不需要加锁。
+    """
+    n = len(buffer)
+    if n == buffer.maxlen:
+        logger.warning(f"写库缓冲已满（{n}条），最早的数据已被丢弃")
+    batch = []
+    popleft = buffer.popleft
+    try:
+        for _ in range(n):
+            batch.append(popleft())
+    except IndexError:
+        # 另一个线程同时取走了部分元素
+        pass
+    return batch
+
 
 class CTPRealtimeData:
     """CTP实时行情接口"""
     
+    # 一次读取vnpy TickData的全部字段（缺少属性时改为逐个读取）
+    _TICK_FIELDS = attrgetter('symbol', 'datetime', 'last_price', 'volume', 'open_interest',
+                              'bid_price_1', 'bid_volume_1', 'ask_price_1', 'ask_volume_1', 'turnover')
+    # 一次读取vnpy BarData的全部字段（缺少属性时改为逐个读取）
+    _BAR_FIELDS = attrgetter('symbol', 'interval', 'datetime', 'open_price', 'high_price', 'low_price',
+                             'close_price', 'volume', 'open_interest', 'turnover')
+    
     def __init__(self, db_manager: Optional[DatabaseManager] = None,
                  auto_save: bool = True,
                  environment: Optional[str] = None):
@@ -67,16 +107,26 @@ class CTPRealtimeData:
         self.auto_save = auto_save
         self.environment = environment or settings.CTP_ENVIRONMENT
         
-        # 订阅的合约列表
-        self.subscribed_symbols: List[str] = []
+        # 已订阅的合约 {合约代码: vt_symbol}（字典按订阅顺序保存，成员判断为O(1)）
+        self._subscriptions: Dict[str, str] = {}
+        # 行情推送的合约代码 -> 去掉交易所后缀的合约代码（首次出现时计算）
+        self._symbol_names: Dict[str, str] = {}
         
-        # 回调函数
-        self.tick_callbacks: List[Callable] = []
-        self.kline_callbacks: List[Callable] = []
+        # 回调函数（注册时整体替换为新元组，行情线程遍历时不受并发注册影响）
+        self.tick_callbacks: Tuple[Callable, ...] = ()
+        self.kline_callbacks: Tuple[Callable, ...] = ()
         
         # 连接状态
         self.is_connected = False
-        self._stop_event = Event()
+        self._connected_event = Event()  # 收到连接/登录成功或失败日志时置位，唤醒connect中的等待
+        self._connect_error: Optional[str] = None  # 本次连接过程中收到的失败日志
+        self._stop_event = Event()  # disconnect时置位，用于中断等待和停止后台线程
+        
+        # 自动保存的写库缓冲（按数量或定时批量写入）
+        self._tick_buffer: Deque[TickData] = deque(maxlen=_BUFFER_MAXLEN)
+        self._kline_buffer: Deque[KlineData] = deque(maxlen=_BUFFER_MAXLEN)
+        self._flush_wakeup = Event()  # 缓冲达到_FLUSH_SIZE时置位，提前唤醒写库线程
+        self._flush_thread: Optional[Thread] = None
         
         # vnpy-ctp 事件引擎和网关
         self._event_engine: Optional[EventEngine] = None
@@ -92,13 +142,7 @@ class CTPRealtimeData:
         Returns:
             是否连接成功
         """
-        # #region agent log
-        import json
-        try:
-            with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"connect() called","data":{"is_connected":self.is_connected,"VNPY_CTP_AVAILABLE":VNPY_CTP_AVAILABLE},"timestamp":int(time.time()*1000)})+'\n')
-        except: pass
-        # #endregion
+        logger.debug("connect() called is_connected=%s", self.is_connected)
         
         if self.is_connected:
             logger.warning("已经连接到CTP服务器")
@@ -106,12 +150,6 @@ class CTPRealtimeData:
         
         if not VNPY_CTP_AVAILABLE:
             logger.error("vnpy-ctp未安装，无法连接SimNow")
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"VNPY_CTP_AVAILABLE is False","data":{},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
             return False
         
         try:
@@ -122,41 +160,21 @@ class CTPRealtimeData:
                 logger.warning(f"当前不在交易时间内，CTP主席系统不开放")
                 logger.info(f"下一个交易时间: {next_time.strftime('%Y-%m-%d %H:%M:%S')}")
                 logger.info("提示：如需在非交易时间测试，请使用7x24环境（端口40001/40011）")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"ctp_realtime.py:connect","message":"Not in trading time","data":{"current_time":datetime.now().strftime('%H:%M:%S'),"next_trading_time":next_time.strftime('%Y-%m-%d %H:%M:%S')},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return False
             
             # 验证配置
             if not settings.validate_ctp_config():
                 logger.error("CTP配置不完整，请检查.env文件中的配置项")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"Config validation failed","data":{},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return False
             
             # 根据环境类型获取服务器地址
             addresses = settings.get_server_addresses(self.environment)
+            logger.debug("environment=%s md_address=%s trade_address=%s",
+                         self.environment, addresses['md_address'], addresses['trade_address'])
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"ctp_realtime.py:connect","message":"Addresses retrieved","data":{"environment":self.environment,"md_address":addresses['md_address'],"trade_address":addresses['trade_address']},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"Creating EventEngine and CtpGateway","data":{"environment":self.environment,"is_7x24":is_7x24},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            self._connected_event.clear()
+            self._stop_event.clear()
+            self._connect_error = None
             
             # 创建事件引擎
             self._event_engine = EventEngine()
@@ -175,72 +193,23 @@ class CTPRealtimeData:
                 f"{gateway_name}.eTick",  # 'CTP.eTick'
             ]
             
-            # 添加通用事件监听器用于调试（捕获所有事件）
-            def _debug_all_events(event):
-                # #region agent log
-                try:
-                    event_type = type(event).__name__
-                    has_data = hasattr(event, 'data')
-                    data_type = type(event.data).__name__ if has_data else None
-                    # 尝试获取事件类型字符串
-                    event_type_str = str(getattr(event, 'type', None) or getattr(event, '__class__', None) or event_type)
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"ALL_EVENTS","location":"ctp_realtime.py:connect","message":"All events listener triggered","data":{"event_type":event_type_str[:100],"has_data":has_data,"data_type":data_type},"timestamp":int(time.time()*1000)})+'\n')
-                except Exception as e:
-                    try:
-                        with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"ALL_EVENTS","location":"ctp_realtime.py:connect","message":"All events listener error","data":{"error":str(e)[:100]},"timestamp":int(time.time()*1000)})+'\n')
-                    except: pass
-                # #endregion
-            
             tick_registered = False
             for tick_event in possible_tick_events:
                 try:
                     self._event_engine.register(tick_event, self._on_tick_event)
                     tick_registered = True
-                    # #region agent log
-                    try:
-                        with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"ctp_realtime.py:connect","message":"Tick event registered successfully","data":{"event_name":tick_event,"EVENT_TICK":EVENT_TICK},"timestamp":int(time.time()*1000)})+'\n')
-                    except: pass
-                    # #endregion
+                    logger.debug("Tick事件注册成功: %s", tick_event)
                     break
                 except Exception as reg_error:
-                    # #region agent log
-                    try:
-                        with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"ctp_realtime.py:connect","message":"Tick event registration attempt failed","data":{"event_name":tick_event,"error":str(reg_error)[:100]},"timestamp":int(time.time()*1000)})+'\n')
-                    except: pass
-                    # #endregion
+                    logger.debug("Tick事件注册失败: %s, %s", tick_event, reg_error)
                     continue
             
             if not tick_registered:
                 # 如果都失败，至少注册默认的
                 self._event_engine.register(EVENT_TICK, self._on_tick_event)
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"ctp_realtime.py:connect","message":"Using default EVENT_TICK registration","data":{"EVENT_TICK":EVENT_TICK},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
             
             self._event_engine.register(EVENT_LOG, self._on_log_event)
             
-            # 尝试注册所有可能的事件类型用于调试
-            all_possible_events = [EVENT_TICK, EVENT_LOG, "eTick", "eTick.", "CTP.eTick", "CTP.eTick.", "tick", "Tick"]
-            for evt in all_possible_events:
-                try:
-                    self._event_engine.register(evt, _debug_all_events)
-                except:
-                    pass
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"ctp_realtime.py:connect","message":"Events registered","data":{"EVENT_TICK":EVENT_TICK,"EVENT_LOG":EVENT_LOG,"tick_registered":tick_registered},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 配置CTP连接参数
             ctp_setting = {
                 "用户名": settings.CTP_USER_ID,
@@ -252,81 +221,34 @@ class CTPRealtimeData:
                 "授权编码": settings.CTP_AUTH_CODE,
             }
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"E","location":"ctp_realtime.py:connect","message":"CTP setting prepared","data":{"行情服务器":ctp_setting["行情服务器"],"交易服务器":ctp_setting["交易服务器"],"addresses_md":addresses['md_address'],"addresses_trade":addresses['trade_address']},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 启动事件引擎
             self._event_engine.start()
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"EventEngine started, calling gateway.connect()","data":{"ctp_setting_keys":list(ctp_setting.keys())},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 连接
             env_name = "7x24环境" if is_7x24 else "CTP主席系统"
             logger.info(f"正在连接SimNow行情服务器（{env_name}）: {addresses['md_address']}")
-            try:
-                self._ctp_gateway.connect(ctp_setting)
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"gateway.connect() called successfully","data":{},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
-            except Exception as connect_error:
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"gateway.connect() raised exception","data":{"error":str(connect_error)},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
-                raise
+            self._ctp_gateway.connect(ctp_setting)
             
-            # 等待连接完成（最多等待10秒）
+            # 等待连接完成（最多等待10秒，收到登录成功或失败日志后立即返回）
             timeout = 10
             start_time = time.time()
-            check_count = 0
-            while not self.is_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-                check_count += 1
-                # 每1秒记录一次状态
-                if check_count % 10 == 0:
-                    # #region agent log
-                    try:
-                        with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"Waiting for connection","data":{"is_connected":self.is_connected,"elapsed":time.time()-start_time,"check_count":check_count},"timestamp":int(time.time()*1000)})+'\n')
-                    except: pass
-                    # #endregion
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"Connection wait finished","data":{"is_connected":self.is_connected,"elapsed":time.time()-start_time},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            self._connected_event.wait(timeout)
+            logger.debug("connection wait finished is_connected=%s elapsed=%.1fs",
+                         self.is_connected, time.time() - start_time)
             
             if self.is_connected:
                 logger.info("SimNow行情服务器连接成功")
+                self._start_flush_thread()
                 return True
+            elif self._connect_error:
+                logger.error(f"SimNow行情服务器连接失败: {self._connect_error}")
+                return False
             else:
                 logger.error("SimNow行情服务器连接超时")
                 return False
             
         except Exception as e:
             logger.error(f"连接SimNow服务器失败: {e}", exc_info=True)
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"ctp_realtime.py:connect","message":"Exception in connect()","data":{"error":str(e)},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
             return False
     
     def disconnect(self):
@@ -336,7 +258,7 @@ class CTPRealtimeData:
         
         try:
             # 取消所有订阅
-            for symbol in list(self.subscribed_symbols):
+            for symbol in list(self._subscriptions):
                 self.unsubscribe(symbol)
             
             # 断开网关连接
@@ -352,6 +274,13 @@ class CTPRealtimeData:
             self._stop_event.set()
             self.is_connected = False
             
+            # 停止写库线程，并写入缓冲中剩余的数据
+            self._flush_wakeup.set()
+            if self._flush_thread:
+                self._flush_thread.join(timeout=_FLUSH_INTERVAL * 2)
+                self._flush_thread = None
+            self._flush_buffers()
+            
             logger.info("已断开SimNow连接")
             
         except Exception as e:
@@ -372,7 +301,7 @@ class CTPRealtimeData:
             logger.error("未连接到SimNow服务器，请先调用connect()")
             return False
         
-        if symbol in self.subscribed_symbols:
+        if symbol in self._subscriptions:
             logger.warning(f"合约 {symbol} 已经订阅")
             return True
         
@@ -395,14 +324,6 @@ class CTPRealtimeData:
             symbol_normalized = symbol.upper()  # 确保大写
             subscribe_req = SubscribeRequest(symbol_normalized, exchange_enum)
             
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"Creating SubscribeRequest","data":{"symbol":symbol,"symbol_normalized":symbol_normalized,"exchange_str":exchange_str,"exchange_enum":str(exchange_enum),"vt_symbol":subscribe_req.vt_symbol},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 尝试先查询合约信息（如果需要）
             try:
                 # vnpy-ctp可能需要先查询合约信息
@@ -418,56 +339,21 @@ class CTPRealtimeData:
                 # 注意：vnpy-ctp的gateway可能没有直接的query_contract方法
                 # 但订阅时会自动查询合约信息
             except Exception as contract_error:
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"Contract query attempt","data":{"error":str(contract_error)[:100]},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 pass
             
             # 订阅行情
             self._ctp_gateway.subscribe(subscribe_req)
+            logger.debug("gateway.subscribe called vt_symbol=%s", subscribe_req.vt_symbol)
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"Subscribe called on gateway","data":{"vt_symbol":subscribe_req.vt_symbol,"gateway_type":type(self._ctp_gateway).__name__},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"Subscribe called","data":{"symbol":symbol,"vt_symbol":subscribe_req.vt_symbol,"gateway_exists":self._ctp_gateway is not None,"event_engine_running":self._event_engine is not None},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
-            self.subscribed_symbols.append(symbol)
+            self._subscriptions[symbol] = subscribe_req.vt_symbol
             logger.info(f"订阅合约成功: {symbol} ({subscribe_req.vt_symbol})")
             
             # 检查交易时间
-            from utils.helpers import is_trading_time
             current_time = datetime.now()
             is_trading = is_trading_time(current_time)
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"Trading time check","data":{"symbol":symbol,"current_time":current_time.strftime("%Y-%m-%d %H:%M:%S"),"is_trading_time":is_trading,"environment":self.environment},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
-            # 等待一小段时间，看是否有Tick数据到达
-            import time as time_module
-            time_module.sleep(2.0)  # 增加等待时间到2秒
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"F","location":"ctp_realtime.py:subscribe","message":"After subscribe wait","data":{"symbol":symbol,"subscribed_count":len(self.subscribed_symbols),"tick_callbacks":len(self.tick_callbacks)},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            # 等待一小段时间，看是否有Tick数据到达（disconnect时立即结束等待）
+            self._stop_event.wait(2.0)
             
             # 如果不在交易时间且不是7x24环境，给出提示
             if not is_trading and not settings.is_7x24_environment(self.environment):
@@ -490,19 +376,14 @@ class CTPRealtimeData:
         Returns:
             是否取消订阅成功
         """
-        if symbol not in self.subscribed_symbols:
+        if symbol not in self._subscriptions:
             logger.warning(f"合约 {symbol} 未订阅")
             return False
         
         try:
-            if self._ctp_gateway:
-                exchange = self._get_exchange_from_symbol(symbol)
-                vt_symbol = f"{symbol}.{exchange}"
-                # vnpy-ctp通常通过取消订阅实现，但API可能不同
-                # 这里先移除订阅列表，实际取消由网关处理
-                pass
-            
-            self.subscribed_symbols.remove(symbol)
+            # vnpy-ctp通常通过取消订阅实现，但API可能不同
+            # 这里先移除订阅列表，实际取消由网关处理
+            del self._subscriptions[symbol]
             logger.info(f"取消订阅成功: {symbol}")
             return True
             
@@ -518,7 +399,7 @@ class CTPRealtimeData:
             callback: 回调函数，接收TickData参数
         """
         if callback not in self.tick_callbacks:
-            self.tick_callbacks.append(callback)
+            self.tick_callbacks += (callback,)
             logger.info("Tick回调函数注册成功")
     
     def register_kline_callback(self, callback: Callable[[KlineData], None]):
@@ -529,7 +410,7 @@ class CTPRealtimeData:
             callback: 回调函数，接收KlineData参数
         """
         if callback not in self.kline_callbacks:
-            self.kline_callbacks.append(callback)
+            self.kline_callbacks += (callback,)
             logger.info("K线回调函数注册成功")
     
     def _on_tick_event(self, event):
@@ -540,66 +421,24 @@ class CTPRealtimeData:
             event: vnpy事件对象，包含Tick数据
         """
         try:
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"TICK","location":"ctp_realtime.py:_on_tick_event","message":"Tick event received","data":{"has_data":hasattr(event,'data'),"event_type":type(event).__name__},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             tick_data = event.data
             
-            # #region agent log
-            try:
-                symbol = tick_data.symbol if hasattr(tick_data, 'symbol') else "UNKNOWN"
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"TICK","location":"ctp_realtime.py:_on_tick_event","message":"Tick data extracted","data":{"symbol":symbol,"tick_type":type(tick_data).__name__},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 转换vnpy-ctp Tick数据格式
             tick = self._convert_vnpy_tick_data(tick_data)
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"TICK","location":"ctp_realtime.py:_on_tick_event","message":"Tick converted","data":{"tick_exists":tick is not None,"tick_symbol":tick.symbol if tick else None,"callback_count":len(self.tick_callbacks)},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             if not tick or not self.data_handler.validate_tick(tick):
                 return
             
-            # 自动保存到数据库
+            # 自动保存到数据库（放入缓冲批量写入；批量写入不经过ORM会话，对象不会绑定到会话，
+            # 回调可以直接使用原对象）
             if self.auto_save:
-                # 保存前创建对象的副本，避免会话绑定问题
-                # 提取所有属性值，创建新的未绑定对象
-                tick_for_callback = TickData(
-                    symbol=tick.symbol,
-                    exchange=tick.exchange,
-                    datetime=tick.datetime,
-                    last_price=tick.last_price,
-                    volume=tick.volume,
-                    open_interest=tick.open_interest,
-                    bid_price1=tick.bid_price1,
-                    bid_volume1=tick.bid_volume1,
-                    ask_price1=tick.ask_price1,
-                    ask_volume1=tick.ask_volume1,
-                    turnover=tick.turnover
-                )
-                
-                # 保存原始对象
-                self.db_manager.save_tick(tick)
-                
-                # 使用未绑定的副本调用回调
-                tick = tick_for_callback
-            else:
-                # 如果不保存，直接使用原始对象
-                pass
+                self._buffer_tick(tick)
             
             # 调用注册的回调函数
-            for callback in self.tick_callbacks:
+            callbacks = self.tick_callbacks
+            if not callbacks:
+                return
+            for callback in callbacks:
                 try:
                     callback(tick)
                 except Exception as e:
@@ -625,14 +464,6 @@ class CTPRealtimeData:
             event: vnpy事件对象，包含日志信息
         """
         try:
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"ctp_realtime.py:_on_log_event","message":"Log event RECEIVED","data":{"event_type":type(event).__name__,"has_data":hasattr(event,'data')},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # vnpy 事件对象通常有 data 属性
             if hasattr(event, 'data'):
                 log_data = event.data
@@ -650,37 +481,22 @@ class CTPRealtimeData:
             else:
                 log_msg = str(event)
                 log_level = 'INFO'
-            
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"ctp_realtime.py:_on_log_event","message":"Log event processed","data":{"msg":log_msg[:100] if log_msg else "","level":log_level},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
+            logger.debug("CTP日志 [%s] %s", log_level, log_msg)
             
             # 处理连接状态
             log_msg_lower = log_msg.lower() if log_msg else ''
-            if any(keyword in log_msg for keyword in ['连接成功', '登录成功', 'connected', 'login success']) or any(keyword in log_msg_lower for keyword in ['connected', 'login success']):
+            if any(keyword in log_msg_lower for keyword in _CONNECT_SUCCESS_KEYWORDS):
                 self.is_connected = True
+                self._connected_event.set()
                 logger.info(f"SimNow连接成功: {log_msg}")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"ctp_realtime.py:_on_log_event","message":"Connection SUCCESS detected","data":{"is_connected":self.is_connected},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
-            elif any(keyword in log_msg for keyword in ['连接失败', '登录失败', 'failed', 'error']) or any(keyword in log_msg_lower for keyword in ['failed', 'error', 'timeout']):
+            elif any(keyword in log_msg_lower for keyword in _CONNECT_FAILURE_KEYWORDS):
                 self.is_connected = False
+                self._connect_error = log_msg
+                self._connected_event.set()
                 logger.error(f"SimNow连接失败: {log_msg}")
             
         except Exception as e:
             logger.debug(f"处理日志事件失败: {e}")
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"ctp_realtime.py:_on_log_event","message":"Exception in log event handler","data":{"error":str(e)},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
     
     def _on_bar(self, bar_data: Dict):
         """
@@ -696,12 +512,15 @@ class CTPRealtimeData:
             if not self.data_handler.validate_kline(kline):
                 return
             
-            # 自动保存到数据库
+            # 自动保存到数据库（放入缓冲批量写入）
             if self.auto_save:
-                self.db_manager.save_kline(kline)
+                self._buffer_kline(kline)
             
             # 调用注册的回调函数
-            for callback in self.kline_callbacks:
+            callbacks = self.kline_callbacks
+            if not callbacks:
+                return
+            for callback in callbacks:
                 try:
                     callback(kline)
                 except Exception as e:
@@ -710,6 +529,46 @@ class CTPRealtimeData:
         except Exception as e:
             logger.error(f"处理K线数据失败: {e}")
     
+    def _buffer_tick(self, tick: TickData):
+        """Tick放入写库缓冲（行情线程不访问数据库），达到_FLUSH_SIZE条时唤醒写库线程"""
+        buffer = self._tick_buffer
+        buffer.append(tick)
+        if len(buffer) >= _FLUSH_SIZE:
+            self._flush_wakeup.set()
+    
+    def _buffer_kline(self, kline: KlineData):
+        """K线放入写库缓冲（行情线程不访问数据库），达到_FLUSH_SIZE条时唤醒写库线程"""
+        buffer = self._kline_buffer
+        buffer.append(kline)
+        if len(buffer) >= _FLUSH_SIZE:
+            self._flush_wakeup.set()
+    
+    def _flush_buffers(self):
+        """把缓冲中的Tick和K线全部写库"""
+        ticks = _drain(self._tick_buffer)
+        klines = _drain(self._kline_buffer)
+        if ticks:
+            self.db_manager.save_ticks_batch(ticks)
+        if klines:
+            self.db_manager.save_klines_batch(klines)
+    
+    def _start_flush_thread(self):
+        """启动写库线程（每_FLUSH_INTERVAL秒或缓冲达到_FLUSH_SIZE条时写入一次，disconnect时退出）"""
+        if not self.auto_save or (self._flush_thread and self._flush_thread.is_alive()):
+            return
+        self._flush_thread = Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+    
+    def _flush_loop(self):
+        """写库循环"""
+        while not self._stop_event.is_set():
+            self._flush_wakeup.wait(_FLUSH_INTERVAL)
+            self._flush_wakeup.clear()
+            try:
+                self._flush_buffers()
+            except Exception as e:
+                logger.error(f"写库失败: {e}")
+    
     def _convert_vnpy_tick_data(self, tick_data) -> Optional[TickData]:
         """
         转换vnpy-ctp Tick数据格式
@@ -721,29 +580,44 @@ class CTPRealtimeData:
             TickData对象
         """
         try:
-            # vnpy TickData对象属性
-            symbol = tick_data.symbol.split('.')[0] if '.' in tick_data.symbol else tick_data.symbol
-            dt = tick_data.datetime if hasattr(tick_data, 'datetime') else datetime.now()
-            
-            tick = self.data_handler.create_tick(
-                symbol=symbol,
-                dt=dt,
-                last_price=float(tick_data.last_price) if hasattr(tick_data, 'last_price') else 0.0,
-                volume=int(tick_data.volume) if hasattr(tick_data, 'volume') else 0,
-                open_interest=int(tick_data.open_interest) if hasattr(tick_data, 'open_interest') else 0,
-                bid_price1=float(tick_data.bid_price_1) if hasattr(tick_data, 'bid_price_1') else None,
-                bid_volume1=int(tick_data.bid_volume_1) if hasattr(tick_data, 'bid_volume_1') else None,
-                ask_price1=float(tick_data.ask_price_1) if hasattr(tick_data, 'ask_price_1') else None,
-                ask_volume1=int(tick_data.ask_volume_1) if hasattr(tick_data, 'ask_volume_1') else None,
-                turnover=float(tick_data.turnover) if hasattr(tick_data, 'turnover') else 0.0
+            try:
+                # vnpy TickData的字段一次读出
+                symbol, dt, last_price, volume, open_interest, bid_price, bid_volume, ask_price, ask_volume, turnover = \
+                    self._TICK_FIELDS(tick_data)
+            except AttributeError:
+                # 字段不全时逐个读取，缺失的字段使用默认值
+                return self._convert_partial_tick_data(tick_data)
+            
+            return self.data_handler.create_tick(
+                self._symbol_names.get(symbol) or self._strip_symbol(symbol), dt, float(last_price), int(volume), int(open_interest),
+                float(bid_price), int(bid_volume), float(ask_price), int(ask_volume), float(turnover)
             )
             
-            return tick
-            
         except Exception as e:
             logger.error(f"转换Tick数据失败: {e}", exc_info=True)
             return None
     
+    def _convert_partial_tick_data(self, tick_data) -> TickData:
+        """按字段逐个转换缺少部分属性的Tick对象"""
+        symbol = self._strip_symbol(tick_data.symbol)
+        bid_price = getattr(tick_data, 'bid_price_1', None)
+        bid_volume = getattr(tick_data, 'bid_volume_1', None)
+        ask_price = getattr(tick_data, 'ask_price_1', None)
+        ask_volume = getattr(tick_data, 'ask_volume_1', None)
+        
+        return self.data_handler.create_tick(
+            symbol=symbol,
+            dt=getattr(tick_data, 'datetime', None) or datetime.now(),
+            last_price=float(getattr(tick_data, 'last_price', 0.0)),
+            volume=int(getattr(tick_data, 'volume', 0)),
+            open_interest=int(getattr(tick_data, 'open_interest', 0)),
+            bid_price1=None if bid_price is None else float(bid_price),
+            bid_volume1=None if bid_volume is None else int(bid_volume),
+            ask_price1=None if ask_price is None else float(ask_price),
+            ask_volume1=None if ask_volume is None else int(ask_volume),
+            turnover=float(getattr(tick_data, 'turnover', 0.0))
+        )
+    
     def _convert_vnpy_bar_data(self, bar_data) -> Optional[KlineData]:
         """
         转换vnpy-ctp Bar数据格式
@@ -755,45 +629,49 @@ class CTPRealtimeData:
             KlineData对象
         """
         try:
-            # vnpy BarData对象属性
-            symbol = bar_data.symbol.split('.')[0] if '.' in bar_data.symbol else bar_data.symbol
-            interval = bar_data.interval.value if hasattr(bar_data.interval, 'value') else '1m'
-            dt = bar_data.datetime if hasattr(bar_data, 'datetime') else datetime.now()
-            
-            kline = self.data_handler.create_kline(
-                symbol=symbol,
-                dt=dt,
-                interval=interval,
-                open_price=float(bar_data.open_price) if hasattr(bar_data, 'open_price') else 0.0,
-                high_price=float(bar_data.high_price) if hasattr(bar_data, 'high_price') else 0.0,
-                low_price=float(bar_data.low_price) if hasattr(bar_data, 'low_price') else 0.0,
-                close_price=float(bar_data.close_price) if hasattr(bar_data, 'close_price') else 0.0,
-                volume=int(bar_data.volume) if hasattr(bar_data, 'volume') else 0,
-                open_interest=int(bar_data.open_interest) if hasattr(bar_data, 'open_interest') else 0,
-                turnover=float(bar_data.turnover) if hasattr(bar_data, 'turnover') else 0.0
+            try:
+                # vnpy BarData的字段一次读出
+                symbol, interval, dt, open_price, high_price, low_price, close_price, volume, open_interest, turnover = \
+                    self._BAR_FIELDS(bar_data)
+            except AttributeError:
+                # 字段不全时逐个读取，缺失的字段使用默认值
+                return self._convert_partial_bar_data(bar_data)
+            
+            return self.data_handler.create_kline(
+                self._symbol_names.get(symbol) or self._strip_symbol(symbol), dt, getattr(interval, 'value', '1m'),
+                float(open_price), float(high_price), float(low_price), float(close_price),
+                int(volume), int(open_interest), float(turnover)
             )
             
-            return kline
-            
         except Exception as e:
             logger.error(f"转换Bar数据失败: {e}", exc_info=True)
             return None
     
+    def _convert_partial_bar_data(self, bar_data) -> KlineData:
+        """按字段逐个转换缺少部分属性的Bar对象"""
+        symbol = self._strip_symbol(bar_data.symbol)
+        
+        return self.data_handler.create_kline(
+            symbol=symbol,
+            dt=getattr(bar_data, 'datetime', None) or datetime.now(),
+            interval=getattr(getattr(bar_data, 'interval', None), 'value', '1m'),
+            open_price=float(getattr(bar_data, 'open_price', 0.0)),
+            high_price=float(getattr(bar_data, 'high_price', 0.0)),
+            low_price=float(getattr(bar_data, 'low_price', 0.0)),
+            close_price=float(getattr(bar_data, 'close_price', 0.0)),
+            volume=int(getattr(bar_data, 'volume', 0)),
+            open_interest=int(getattr(bar_data, 'open_interest', 0)),
+            turnover=float(getattr(bar_data, 'turnover', 0.0))
+        )
+    
+    def _strip_symbol(self, symbol: str) -> str:
+        """去掉合约代码的交易所后缀，并记入_symbol_names供后续行情直接查表"""
+        name = self._symbol_names[symbol] = symbol.partition('.')[0]
+        return name
+    
     def _get_exchange_from_symbol(self, symbol: str) -> str:
         """从合约代码获取交易所代码（字符串）"""
-        # 根据合约代码前缀判断交易所
-        if symbol.startswith('rb') or symbol.startswith('cu') or symbol.startswith('au') or symbol.startswith('ag'):
-            return 'SHFE'  # 上海期货交易所
-        elif symbol.startswith('i') or symbol.startswith('j') or symbol.startswith('jm') or symbol.startswith('c'):
-            return 'DCE'  # 大连商品交易所
-        elif symbol.startswith('CF') or symbol.startswith('SR') or symbol.startswith('MA') or symbol.startswith('ZC'):
-            return 'CZCE'  # 郑州商品交易所
-        elif symbol.startswith('IF') or symbol.startswith('IC') or symbol.startswith('IH') or symbol.startswith('IM'):
-            return 'CFFEX'  # 中国金融期货交易所
-        elif symbol.startswith('sc') or symbol.startswith('lu') or symbol.startswith('bc'):
-            return 'INE'  # 上海国际能源交易中心
-        else:
-            return 'SHFE'  # 默认
+        return get_exchange_from_symbol(symbol)
     
     def _get_exchange_enum(self, exchange_str: str):
         """将交易所字符串转换为Exchange枚举"""
@@ -810,7 +688,12 @@ class CTPRealtimeData:
         }
         return exchange_map.get(exchange_str)
     
+    @property
+    def subscribed_symbols(self) -> List[str]:
+        """已订阅的合约列表（按订阅顺序）"""
+        return list(self._subscriptions)
+    
     def get_subscribed_symbols(self) -> List[str]:
         """获取已订阅的合约列表"""
-        return self.subscribed_symbols.copy()
+        return list(self._subscriptions)
 
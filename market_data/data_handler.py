@@ -39,21 +39,9 @@ class DataHandler:
         """
         symbol_code, exchange = parse_symbol(symbol)
         
-        kline = KlineData(
-            symbol=symbol_code,
-            exchange=exchange,
-            datetime=dt,
-            interval=interval,
-            open=open_price,
-            high=high_price,
-            low=low_price,
-            close=close_price,
-            volume=volume,
-            open_interest=open_interest,
-            turnover=turnover
-        )
-        
-        return kline
+        return KlineData(symbol_code, exchange, dt, interval,
+                         open_price, high_price, low_price, close_price,
+                         volume, open_interest, turnover)
     
     @staticmethod
     def create_tick(symbol: str, dt: datetime,
@@ -84,21 +72,8 @@ class DataHandler:
         """
         symbol_code, exchange = parse_symbol(symbol)
         
-        tick = TickData(
-            symbol=symbol_code,
-            exchange=exchange,
-            datetime=dt,
-            last_price=last_price,
-            volume=volume,
-            open_interest=open_interest,
-            bid_price1=bid_price1,
-            bid_volume1=bid_volume1,
-            ask_price1=ask_price1,
-            ask_volume1=ask_volume1,
-            turnover=turnover
-        )
-        
-        return tick
+        return TickData(symbol_code, exchange, dt, last_price, volume, open_interest,
+                        bid_price1, bid_volume1, ask_price1, ask_volume1, turnover)
     
     @staticmethod
     def validate_kline(kline: KlineData) -> bool:
@@ -31,9 +31,9 @@ class StrategyTemplate(BaseStrategy):
         self.write_log("策略初始化完成")
         
         # TODO: 在这里初始化策略需要的指标、变量等
-        # 例如：
-        # self.ma_fast = MAIndicator(period=5)
-        # self.ma_slow = MAIndicator(period=20)
+        # 例如（indicators中的增量计算状态，每根新K线O(1)更新，不必重算全部历史）：
+        # self.ma_fast = MAState(period=5)
+        # self.ma_slow = MAState(period=20)
         # self.position = 0
     
     def on_tick(self, tick: TickData):
@@ -0,0 +1,120 @@
+"""
+历史K线缓存测试脚本（使用内存数据库，不连接CTP）
+"""
+from datetime import datetime, timedelta
+
+from database.db_manager import DatabaseManager
+from database.models import KlineData
+from market_data.ctp_history import CTPHistoryData
+
+# 螺纹钢的交易时段（K线时间为每分钟的开始时间）
+RB_SESSIONS = (
+    ((9, 0), (10, 15)),
+    ((10, 30), (11, 30)),
+    ((13, 30), (15, 0)),
+    ((21, 0), (23, 0)),
+)
+
+
+def make_session_klines(symbol: str, day: datetime, night: bool = True) -> list:
+    """生成某个交易日完整的1分钟K线"""
+    klines = []
+    for (h1, m1), (h2, m2) in RB_SESSIONS if night else RB_SESSIONS[:3]:
+        t = day.replace(hour=h1, minute=m1)
+        end = day.replace(hour=h2, minute=m2)
+        while t < end:
+            klines.append(KlineData(symbol, 'SHFE', t, '1m', 3500.0, 3501.0, 3499.0, 3500.0, 1, 1, 1.0))
+            t += timedelta(minutes=1)
+    return klines
+
+
+def make_history(*days: datetime, night: bool = True):
+    """创建写入了指定交易日K线的历史数据接口，返回 (接口, CTP查询记录)"""
+    db = DatabaseManager('sqlite://')
+    db.create_tables()
+    for day in days:
+        db.save_klines_batch(make_session_klines('rb2405', day, night))
+
+    history = CTPHistoryData(db_manager=db)
+    ctp_queries = []
+    history._query_kline_from_ctp = lambda symbol, interval, start, end: ctp_queries.append((start, end)) or []
+    return history, ctp_queries
+
+
+def test_complete_day_session_not_queried():
+    """库中已有完整的日盘K线时不查询CTP"""
+    history, ctp_queries = make_history(datetime(2024, 1, 3), night=False)
+    klines = history.get_kline('rb2405', '1m', '2024-01-03 09:00:00', '2024-01-03 15:00:00', from_db=False)
+    assert len(klines) == 225
+    assert ctp_queries == []
+    print(f"[OK] 完整日盘: {len(klines)}条，未查询CTP")
+
+
+def test_complete_days_not_queried():
+    """库中已有连续多个交易日（含夜盘）的K线时不查询CTP"""
+    history, ctp_queries = make_history(datetime(2024, 1, 2), datetime(2024, 1, 3), datetime(2024, 1, 4))
+    klines = history.get_kline('rb2405', '1m', '2024-01-02 09:00:00', '2024-01-04 15:00:00', from_db=False)
+    assert len(klines) == 225 * 3 + 120 * 2
+    assert ctp_queries == []
+    print(f"[OK] 连续交易日: {len(klines)}条，未查询CTP")
+
+
+def test_date_range_not_queried():
+    """按日期查询（起止时间为零点）且库中已有这些交易日的K线时不查询CTP"""
+    history, ctp_queries = make_history(datetime(2024, 1, 2), datetime(2024, 1, 3), datetime(2024, 1, 4), night=False)
+    klines = history.get_kline('rb2405', '1m', '2024-01-02', '2024-01-05', from_db=False)
+    assert len(klines) == 225 * 3
+    assert ctp_queries == []
+    print(f"[OK] 按日期查询: {len(klines)}条，未查询CTP")
+
+
+def test_daily_klines_not_queried():
+    """库中已有每个交易日的日K线时不查询CTP"""
+    db = DatabaseManager('sqlite://')
+    db.create_tables()
+    db.save_klines_batch([
+        KlineData('rb2405', 'SHFE', datetime(2024, 1, day), '1d', 3500.0, 3510.0, 3490.0, 3505.0, 100, 10, 1.0)
+        for day in (2, 3, 4, 5, 8)
+    ])
+    history = CTPHistoryData(db_manager=db)
+    ctp_queries = []
+    history._query_kline_from_ctp = lambda symbol, interval, start, end: ctp_queries.append((start, end)) or []
+    klines = history.get_kline('rb2405', '1d', '2024-01-02', '2024-01-08', from_db=False)
+    assert len(klines) == 5
+    assert ctp_queries == []
+    print(f"[OK] 日K线: {len(klines)}条，未查询CTP")
+
+
+def test_missing_day_queried():
+    """库中缺少中间的交易日时从开始时间重新查询CTP"""
+    history, ctp_queries = make_history(datetime(2024, 1, 2), datetime(2024, 1, 4))
+    history.get_kline('rb2405', '1m', '2024-01-02 09:00:00', '2024-01-04 15:00:00', from_db=False)
+    assert ctp_queries == [(datetime(2024, 1, 2, 9, 0), datetime(2024, 1, 4, 15, 0))]
+    print("[OK] 缺少交易日: 从开始时间重新查询CTP")
+
+
+def test_missing_tail_queried():
+    """库中数据只覆盖前面部分时只查询最后一根K线之后的部分"""
+    history, ctp_queries = make_history(datetime(2024, 1, 2), night=False)
+    klines = history.get_kline('rb2405', '1m', '2024-01-02 09:00:00', '2024-01-03 15:00:00', from_db=False)
+    assert len(klines) == 225
+    assert ctp_queries == [(datetime(2024, 1, 2, 15, 0), datetime(2024, 1, 3, 15, 0))]
+    print("[OK] 缺少后面部分: 只查询最后一根K线之后的部分")
+
+
+def main():
+    """主函数"""
+    print("\n" + "="*60)
+    print("历史K线缓存测试")
+    print("="*60)
+
+    test_complete_day_session_not_queried()
+    test_complete_days_not_queried()
+    test_date_range_not_queried()
+    test_daily_klines_not_queried()
+    test_missing_day_queried()
+    test_missing_tail_queried()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ from backtest.portfolio import Position, Direction
 from config.settings import settings
 from config.contracts import get_contract_multiplier
 from utils.logger import get_logger
-from utils.helpers import is_trading_time, get_next_trading_time
+from utils.helpers import is_trading_time, get_next_trading_time, get_exchange_from_symbol
 
 logger = get_logger(__name__)
 
@@ -20,15 +20,18 @@ logger = get_logger(__name__)
 try:
     from vnpy_ctp import CtpGateway
     from vnpy.trader.event import EVENT_LOG, EVENT_ORDER, EVENT_TRADE, EVENT_ACCOUNT, EVENT_POSITION
+    from vnpy.trader.constant import Status
     VNPY_CTP_AVAILABLE = True
 except ImportError:
     try:
         # 尝试备用导入路径
         from vnpy.gateway.ctp import CtpGateway
         from vnpy.trader.event import EVENT_LOG, EVENT_ORDER, EVENT_TRADE, EVENT_ACCOUNT, EVENT_POSITION
+        from vnpy.trader.constant import Status
         VNPY_CTP_AVAILABLE = True
     except ImportError:
         VNPY_CTP_AVAILABLE = False
+        Status = None
         EVENT_LOG = "eLog"
         EVENT_ORDER = "eOrder"
         EVENT_TRADE = "eTrade"
@@ -374,34 +377,14 @@ class CTPTrader(TradingInterface):
             # 重置事件
             self._account_query_event.clear()
             
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"K","location":"ctp_trader.py:query_account","message":"Calling query_account","data":{"user_id":self.user_id,"has_ctp_api":self._ctp_api is not None},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 查询账户
             self._ctp_api.query_account()
             
             # 等待查询结果（最多等待5秒）
             if self._account_query_event.wait(timeout=5):
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"K","location":"ctp_trader.py:query_account","message":"Account query success","data":{"account_info":self.account_info},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return self.account_info.copy()
             else:
                 logger.warning("账户查询超时")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"K","location":"ctp_trader.py:query_account","message":"Account query timeout","data":{"account_info":self.account_info},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return self.account_info.copy() if self.account_info else {}
             
         except Exception as e:
@@ -429,34 +412,14 @@ class CTPTrader(TradingInterface):
             # 重置事件
             self._position_query_event.clear()
             
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"M","location":"ctp_trader.py:query_positions","message":"Calling query_position","data":{"has_ctp_api":self._ctp_api is not None},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 查询持仓
             self._ctp_api.query_position()
             
             # 等待查询结果（最多等待5秒）
             if self._position_query_event.wait(timeout=5):
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"M","location":"ctp_trader.py:query_positions","message":"Position query success","data":{"position_count":len(self.positions)},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return list(self.positions.values())
             else:
                 logger.warning("持仓查询超时")
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"M","location":"ctp_trader.py:query_positions","message":"Position query timeout","data":{"position_count":len(self.positions)},"timestamp":int(time.time()*1000)})+'\n')
-                except: pass
-                # #endregion
                 return list(self.positions.values())
             
         except Exception as e:
@@ -627,14 +590,6 @@ class CTPTrader(TradingInterface):
     def _on_position_callback(self, event):
         """vnpy-ctp 持仓更新回调"""
         try:
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"L","location":"ctp_trader.py:_on_position_callback","message":"Position callback triggered","data":{"event_type":type(event).__name__,"has_data":hasattr(event,'data')},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             position_data = event.data
             symbol = getattr(position_data, 'symbol', '') if hasattr(position_data, 'symbol') else position_data.get('symbol', '') if isinstance(position_data, dict) else ''
             if not symbol:
@@ -659,24 +614,8 @@ class CTPTrader(TradingInterface):
     def _on_account_callback(self, event):
         """vnpy-ctp 账户更新回调"""
         try:
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"J","location":"ctp_trader.py:_on_account_callback","message":"Account callback triggered","data":{"event_type":type(event).__name__,"has_data":hasattr(event,'data'),"data_type":type(event.data).__name__ if hasattr(event,'data') else None},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             account_data = event.data
             
-            # #region agent log
-            try:
-                account_attrs = [attr for attr in dir(account_data) if not attr.startswith('_')] if hasattr(account_data, '__dict__') else []
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"J","location":"ctp_trader.py:_on_account_callback","message":"Account data attributes","data":{"attrs":account_attrs[:10]},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             self.account_info = {
                 'balance': float(account_data.balance) if hasattr(account_data, 'balance') else 0.0,
                 'available': float(account_data.available) if hasattr(account_data, 'available') else 0.0,
@@ -686,13 +625,6 @@ class CTPTrader(TradingInterface):
                 'profit': float(account_data.profit) if hasattr(account_data, 'profit') else 0.0,
             }
             
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"J","location":"ctp_trader.py:_on_account_callback","message":"Account info updated","data":{"account_info":self.account_info},"timestamp":int(time.time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 调用账户回调
             if self.on_account_callback:
                 try:
@@ -775,7 +707,6 @@ class CTPTrader(TradingInterface):
         # CTP订单状态：全部成交、部分成交、未成交、已撤销、拒单等
         # vnpy-ctp使用Status枚举
         try:
-            from vnpy.trader.constant import Status
             if hasattr(status, 'value'):
                 status_value = status.value
             elif isinstance(status, Status):
@@ -854,17 +785,7 @@ class CTPTrader(TradingInterface):
     
     def _get_exchange_from_symbol(self, symbol: str) -> str:
         """从合约代码获取交易所代码"""
-        # 根据合约代码前缀判断交易所
-        if symbol.startswith('rb') or symbol.startswith('cu') or symbol.startswith('au'):
-            return 'SHFE'  # 上海期货交易所
-        elif symbol.startswith('i') or symbol.startswith('j') or symbol.startswith('jm'):
-            return 'DCE'  # 大连商品交易所
-        elif symbol.startswith('c') or symbol.startswith('cs') or symbol.startswith('m'):
-            return 'CZCE'  # 郑州商品交易所
-        elif symbol.startswith('IF') or symbol.startswith('IC') or symbol.startswith('IH'):
-            return 'CFFEX'  # 中国金融期货交易所
-        else:
-            return 'SHFE'  # 默认
+        return get_exchange_from_symbol(symbol)
     
     def _get_offset_from_direction(self, direction: OrderDirection) -> str:
         """从订单方向获取开平标志"""
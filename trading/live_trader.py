@@ -192,46 +192,18 @@ class LiveTrader:
         if self.risk_manager:
             # 获取当前价格
             current_price = self._get_current_price(symbol)
-            # #region agent log
-            import json
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"live_trader.py:_submit_order","message":"Getting current price for risk check","data":{"symbol":symbol,"current_price":current_price},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             # 使用实盘账户进行风控检查
             # 创建账户适配器（将LiveAccount转换为Portfolio格式）
             try:
                 from risk.risk_adapter import LiveAccountAdapter
                 adapter = LiveAccountAdapter(self.account)
                 portfolio = adapter.to_portfolio()
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"live_trader.py:_submit_order","message":"Created LiveAccountAdapter","data":{"portfolio_initial_capital":portfolio.initial_capital,"portfolio_current_capital":portfolio.current_capital},"timestamp":int(__import__('time').time()*1000)})+'\n')
-                except: pass
-                # #endregion
             except ImportError:
                 # 如果适配器不存在，使用模拟Portfolio
                 logger.warning("风控适配器未找到，使用模拟Portfolio进行风控检查")
                 from backtest.portfolio import Portfolio
                 portfolio = Portfolio()
-                # #region agent log
-                try:
-                    with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"live_trader.py:_submit_order","message":"Using fallback Portfolio","data":{},"timestamp":int(__import__('time').time()*1000)})+'\n')
-                except: pass
-                # #endregion
-            
             result = self.risk_manager.check_order_risk(order, portfolio, current_price)
-            # #region agent log
-            try:
-                with open(r'c:\Users\lenovo\Desktop\futures_trading_sys\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"live_trader.py:_submit_order","message":"Risk check result","data":{"passed":result.passed,"level":result.level.value if result.level else None,"message":result.message},"timestamp":int(__import__('time').time()*1000)})+'\n')
-            except: pass
-            # #endregion
-            
             if not result.passed:
                 logger.warning(f"订单风控失败: {result.reason}")
                 order.reject(result.reason or "风控检查失败")
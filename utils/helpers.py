@@ -2,14 +2,18 @@
 辅助函数模块
 """
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Tuple
 import re
 
 
+@lru_cache(maxsize=1024)
 def parse_symbol(symbol: str) -> Tuple[str, str]:
     """
     解析合约代码，提取品种和交易所
     
+    结果按合约代码缓存，批量创建K线/Tick时同一合约只解析一次。
+    
     Args:
         symbol: 合约代码，如 'rb2501' 或 'rb2501.SHFE'
     
@@ -55,10 +59,62 @@ def parse_symbol(symbol: str) -> Tuple[str, str]:
     return symbol, exchange
 
 
+# 合约代码前缀（小写） -> 交易所
+_EXCHANGE_BY_PREFIX2 = {
+    # 上海期货交易所
+    'rb': 'SHFE', 'cu': 'SHFE', 'au': 'SHFE', 'ag': 'SHFE',
+    # 大连商品交易所
+    'jm': 'DCE',
+    # 郑州商品交易所
+    'cf': 'CZCE', 'sr': 'CZCE', 'ma': 'CZCE', 'zc': 'CZCE',
+    # 中国金融期货交易所
+    'if': 'CFFEX', 'ic': 'CFFEX', 'ih': 'CFFEX', 'im': 'CFFEX',
+    # 上海国际能源交易中心
+    'sc': 'INE', 'lu': 'INE', 'bc': 'INE',
+}
+# 大商所单字母品种（cs、jd 等同样按首字母归入大商所）
+_EXCHANGE_BY_PREFIX1 = {'i': 'DCE', 'j': 'DCE', 'c': 'DCE', 'm': 'DCE'}
+
+
+@lru_cache(maxsize=1024)
+def get_exchange_from_symbol(symbol: str) -> str:
+    """
+    按合约代码前缀判断交易所，未识别时默认SHFE
+    
+    两位前缀不区分大小写。单字母前缀只在代码为小写（大商所的写法）
+    或第二位是数字时使用，避免 IF、IO 之类的中金所代码被 i 误匹配。
+    结果按合约代码缓存。
+    
+    Args:
+        symbol: 合约代码，如 'rb2501'
+    
+    Returns:
+        交易所代码
+    """
+    prefix = symbol[:2]
+    exchange = _EXCHANGE_BY_PREFIX2.get(prefix.lower())
+    if exchange is None and (prefix[:1].islower() or prefix[1:].isdigit()):
+        exchange = _EXCHANGE_BY_PREFIX1.get(prefix[:1].lower())
+    return exchange or 'SHFE'
+
+
+# parse_datetime依次尝试的日期格式
+_DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%Y%m%d',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+)
+
+
+@lru_cache(maxsize=2048)
 def parse_datetime(date_str: str) -> Optional[datetime]:
     """
     解析日期字符串
     
+    结果按字符串缓存（datetime不可变），回测等反复查询相同日期时不再重复strptime。
+    
     Args:
         date_str: 日期字符串，支持多种格式
                  '2024-01-01', '2024-01-01 10:00:00', '20240101'
@@ -66,15 +122,7 @@ def parse_datetime(date_str: str) -> Optional[datetime]:
     Returns:
         datetime对象，解析失败返回None
     """
-    formats = [
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d',
-        '%Y%m%d',
-        '%Y/%m/%d',
-        '%Y/%m/%d %H:%M:%S',
-    ]
-    
-    for fmt in formats:
+    for fmt in _DATETIME_FORMATS:
         try:
             return datetime.strptime(date_str, fmt)
         except ValueError: